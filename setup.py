@@ -26,6 +26,9 @@ setup(name='pipelinewise-transform-field',
           'dpath==2.0.*',
       ],
       extras_require={
+          'orjson': [
+              'orjson==3.*',
+          ],
           'test': [
               'pytest==6.2.*',
               'pytest-cov==3.0.*',
@@ -0,0 +1,44 @@
+import unittest
+
+from transform_field.batching import AdaptiveBatchSize, INITIAL_BATCH_RECORDS
+
+
+class TestBatching(unittest.TestCase):
+    """
+    Unit Tests for the batching module
+    """
+
+    def test_batch_size_grows_when_fast(self):
+        batch_size = AdaptiveBatchSize(max_records=20000, max_latency_seconds=1.0)
+        self.assertEqual(batch_size.records, INITIAL_BATCH_RECORDS)
+
+        # 1ms per 1000 records, far below the latency target, grows at most by a factor of 2 at a time
+        self.assertEqual(batch_size.update(1000, 0.0005, 0.0003, 0.0002), 2000)
+        self.assertEqual(batch_size.update(2000, 0.001, 0.0006, 0.0004), 4000)
+
+        for _ in range(10):
+            batch_size.update(batch_size.records, 0.001, 0.001, 0.001)
+
+        self.assertEqual(batch_size.records, 20000)
+
+    def test_batch_size_shrinks_when_slow(self):
+        batch_size = AdaptiveBatchSize(max_records=20000, max_latency_seconds=1.0)
+
+        # 1ms per record, the latency target allows 1000 records per batch
+        for _ in range(20):
+            batch_size.update(batch_size.records, batch_size.records * 0.0005, batch_size.records * 0.0004,
+                              batch_size.records * 0.0001)
+
+        self.assertEqual(batch_size.records, 1000)
+
+        # 100ms per record, never below the minimum batch size
+        for _ in range(20):
+            batch_size.update(batch_size.records, 0, batch_size.records * 0.1, 0)
+
+        self.assertEqual(batch_size.records, 100)
+
+    def test_empty_batch_ignored(self):
+        batch_size = AdaptiveBatchSize(max_records=500, max_latency_seconds=1.0)
+
+        self.assertEqual(batch_size.update(0, 10, 10, 10), 500)
+        self.assertIsNone(batch_size.seconds_per_record)
@@ -0,0 +1,85 @@
+import hashlib
+import io
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+from transform_field import TransformField, transform
+from transform_field.cache import MemoCache, DEFAULT_CACHE_MAX_ENTRIES
+
+
+class TestCache(unittest.TestCase):
+    """
+    Unit Tests for the cache module
+    """
+
+    def test_memo_cache(self):
+        transform_value = MagicMock(side_effect=lambda value: value.upper())
+        cache = MemoCache(max_entries=2)
+        cached = cache.wrap(transform_value)
+
+        self.assertListEqual([cached(value) for value in ['a', 'b', 'a', 'c', 'b', 'a']],
+                             ['A', 'B', 'A', 'C', 'B', 'A'])
+
+        # b is evicted when c is cached as a has been used more recently, then a is evicted by b
+        self.assertListEqual([call[0][0] for call in transform_value.call_args_list], ['a', 'b', 'c', 'b', 'a'])
+        self.assertDictEqual(cache.stats(), {'hits': 1, 'misses': 5, 'evictions': 3, 'entries': 2, 'bytes': 4})
+
+    def test_memo_cache_byte_budget(self):
+        cache = MemoCache(max_bytes=10)
+        cached = cache.wrap(lambda value: value)
+
+        cached('abc')
+        cached('def')
+        self.assertEqual(cache.size_bytes, 6)
+        self.assertListEqual(list(cache.entries), ['def'])
+        self.assertEqual(cache.evictions, 1)
+
+        # Values larger than the budget are not cached
+        cached('too long value')
+        self.assertListEqual(list(cache.entries), ['def'])
+
+    def test_make_memo_cache(self):
+        self.assertIsNone(transform.make_memo_cache('HASH', None))
+        self.assertIsNone(transform.make_memo_cache('MASK-NUMBER', True))
+        self.assertIsNotNone(transform.make_memo_cache('MASK-DATE', True))
+        self.assertEqual(transform.make_memo_cache('HASH', True).max_entries, DEFAULT_CACHE_MAX_ENTRIES)
+
+        cache = transform.make_memo_cache('HASH-SKIP-FIRST-2', {'max_entries': 5, 'max_bytes': 100})
+        self.assertEqual((cache.max_entries, cache.max_bytes), (5, 100))
+
+    def test_cached_hash_transformation(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"email":{"type":["null","string"]},'
+            '"merchant":{"type":["null","string"]}}},"key_properties":[]}\n',
+        ] + [
+            f'{{"type":"RECORD","stream":"stream_1","record":{{"email":"user{i % 3}@example.com",'
+            f'"merchant":"m{i % 2}"}}}}\n' for i in range(10)
+        ]
+
+        config = {'transformations': [
+            {'tap_stream_name': 'stream_1', 'field_id': 'email', 'type': 'HASH', 'cache': True},
+            {'tap_stream_name': 'stream_1', 'field_id': 'merchant', 'type': 'HASH-SKIP-FIRST-1',
+             'cache': {'max_entries': 1}},
+        ]}
+
+        outputs = []
+        for use_cache in (True, False):
+            if not use_cache:
+                config['transformations'] = [{**trans, 'cache': None} for trans in config['transformations']]
+
+            instance = TransformField(config)
+            with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+                instance.consume(lines)
+
+            outputs.append(stdout_mock.getvalue())
+
+            if use_cache:
+                self.assertDictEqual(instance.caches['stream_1/email/HASH'].stats(), {
+                    'hits': 7, 'misses': 3, 'evictions': 0, 'entries': 3, 'bytes': 3 * (17 + 64)})
+                self.assertEqual(instance.caches['stream_1/merchant/HASH-SKIP-FIRST-1'].evictions, 9)
+            else:
+                self.assertDictEqual(instance.caches, {})
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn(hashlib.sha256(b'user0@example.com').hexdigest(), outputs[0])
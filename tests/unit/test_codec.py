@@ -0,0 +1,99 @@
+import io
+import math
+import os
+import unittest
+
+from decimal import Decimal
+from unittest.mock import patch
+
+import singer
+
+from transform_field import codec, TransformField
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), '..', 'integration', 'resources')
+
+
+class TestCodec(unittest.TestCase):
+    """
+    Unit Tests for the codec module
+    """
+
+    def setUp(self) -> None:
+        with open(os.path.join(RESOURCES_DIR, 'messages.json'), 'r', encoding='utf-8') as messages_file:
+            self.lines = messages_file.readlines()
+
+        self.config = {'transformations': [
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_1', 'type': 'SET-NULL'},
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_2', 'type': 'HASH'},
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_5', 'type': 'MASK-DATE'},
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_11', 'type': 'SET-NULL',
+             'when': [{'column': 'column_10', 'regex_match': 'sensitive'}]},
+        ]}
+
+    def test_get_json_decoder(self):
+        self.assertEqual(codec.get_json_decoder().name, 'simplejson')
+        self.assertEqual(codec.get_json_decoder('simplejson').name, 'simplejson')
+        self.assertEqual(codec.get_json_decoder('json').name, 'json')
+
+    def test_get_json_decoder_with_unknown_name_fails(self):
+        with self.assertRaises(ValueError):
+            codec.get_json_decoder('fastjson')
+
+    @patch('transform_field.codec.orjson', None)
+    def test_get_json_decoder_falls_back_to_json(self):
+        self.assertEqual(codec.get_json_decoder('auto').name, 'json')
+        self.assertEqual(codec.get_json_decoder('orjson').name, 'json')
+
+    def test_decoders_keep_numbers_exact(self):
+        for name in codec.JSON_DECODERS:
+            decoder = codec.get_json_decoder(name)
+
+            self.assertEqual(decoder.loads('{"a": 1.10, "b": 2}'), {'a': Decimal('1.10'), 'b': 2})
+            self.assertEqual(decoder.loads(b'{"a": 0.10000000000000000000001, "b": 123456789012345678901234567890, '
+                                           b'"c": -9223372036854775809, "d": 1e400, "e": "1.5"}'),
+                             {'a': Decimal('0.10000000000000000000001'), 'b': 123456789012345678901234567890,
+                              'c': -9223372036854775809, 'd': Decimal('1e400'), 'e': '1.5'})
+
+            # Accepted by singer-python even though orjson rejects them
+            self.assertEqual(decoder.loads('{"a": "\\ud83d x", "b": [1, 2.5]}'), {'a': '\ud83d x', 'b': [1, Decimal('2.5')]})
+            self.assertTrue(math.isnan(decoder.loads(b'{"a": NaN}')['a']))
+
+    def test_parse_message_same_as_singer(self):
+        for name in codec.JSON_DECODERS:
+            decoder = codec.get_json_decoder(name)
+
+            for line in self.lines:
+                self.assertEqual(codec.parse_message(line, decoder), singer.parse_message(line))
+
+    def test_parse_message_with_unknown_type(self):
+        self.assertIsNone(codec.parse_message('{"type": "UNKNOWN"}', codec.get_json_decoder()))
+
+    def test_parse_message_with_missing_key_fails(self):
+        with self.assertRaises(Exception):
+            codec.parse_message('{"type": "RECORD", "stream": "dummy_stream"}', codec.get_json_decoder())
+
+    def test_output_same_with_every_decoder(self):
+        # Numbers that would lose precision if decoded into float, in changed and unchanged records
+        lines = self.lines + [
+            '{"type": "RECORD", "stream": "dummy_stream", "record": {"c_pk": 100, "column_2": "changed", '
+            '"n": 0.10000000000000000000001, "b": 123456789012345678901234567890}}\n',
+            '{"type": "RECORD", "stream": "dummy_stream", "record": {"c_pk": 101, '
+            '"n": 0.10000000000000000000001, "b": 123456789012345678901234567890}}\n',
+            # Lone surrogate of a truncated emoji, and NaN
+            '{"type": "RECORD", "stream": "dummy_stream", "record": {"c_pk": 102, "column_2": "\\ud83d x", '
+            '"n": NaN}}\n',
+        ]
+
+        outputs = {}
+        for name in codec.JSON_DECODERS:
+            with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+                TransformField({**self.config, 'json_decoder': name}).consume(lines)
+
+            outputs[name] = stdout_mock.getvalue()
+
+        self.assertIn('"n": 0.10000000000000000000001, "b": 123456789012345678901234567890',
+                      outputs[codec.DEFAULT_JSON_DECODER])
+        self.assertIn('"c_pk": 102', outputs[codec.DEFAULT_JSON_DECODER])
+
+        for name in codec.JSON_DECODERS:
+            self.assertEqual(outputs[name], outputs[codec.DEFAULT_JSON_DECODER])
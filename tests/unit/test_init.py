@@ -1,3 +1,5 @@
+import io
+import json
 import unittest
 from unittest.mock import patch
 
@@ -5,7 +7,8 @@ from singer import Catalog, Schema
 from transform_field.errors import CatalogRequiredException, StreamNotFoundException, NoStreamSchemaException, \
     UnsupportedTransformationTypeException, InvalidTransformationException
 
-from transform_field import TransformField, TransMeta
+from transform_field import TransformField, TransMeta, TransformFieldException
+from transform_field.validation import StreamValidator
 
 
 class TestTransformField(unittest.TestCase):
@@ -51,6 +54,286 @@ class TestTransformField(unittest.TestCase):
             ],
             'stream_2': [TransMeta('column_1', 'MASK-DATE', None, None)],
         })
+        self.assertListEqual(list(instance.trans_plan.keys()), ['stream_1', 'stream_2'])
+        self.assertEqual(len(instance.trans_plan['stream_1']), 2)
+        self.assertEqual(len(instance.trans_plan['stream_2']), 1)
+
+    def test_init_with_invalid_regex_fails(self):
+        self.config['transformations'][1]['when'] = [{'column': 'column_3', 'regex_match': '[a-z'}]
+
+        with self.assertRaises(InvalidTransformationException):
+            TransformField(self.config)
+
+    def test_passthrough_stream_without_transformations(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_3","schema":{"properties":{"id":{"type":"integer"},'
+            '"amount":{"type":"number"}}},"key_properties":["id"]}\n',
+            '{"type":"RECORD","stream":"stream_3","record":{"id":1,"amount":1.50}}\n',
+            '{"type":"RECORD","stream":"stream_3","record":{"id":2,"amount":2E+1}}',
+        ]
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            TransformField(self.config).consume(lines)
+
+        self.assertEqual(stdout_mock.getvalue(), ''.join(lines) + '\n')
+
+    def test_write_input_line_of_unchanged_records(self):
+        config = {'transformations': [{
+            'tap_stream_name': 'stream_1',
+            'field_id': 'column_1',
+            'type': 'SET-NULL',
+            'when': [{'column': 'column_2', 'regex_match': 'PII'}]
+        }]}
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            '"column_2":{"type":"string"}}},"key_properties":[]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a","column_2":"safe"}}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"b","column_2":"has PII"}}\n',
+        ]
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            TransformField(config).consume(lines)
+
+        self.assertListEqual(stdout_mock.getvalue().splitlines()[1:], [
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a","column_2":"safe"}}',
+            '{"type": "RECORD", "stream": "stream_1", "record": {"column_1": null, "column_2": "has PII"}}',
+        ])
+
+    def test_binary_io(self):
+        lines = [
+            b'{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            b'"column_2":{"type":["null","string"]}}},"key_properties":[]}\n',
+            b'{"type":"RECORD","stream":"stream_1","record":{"column_1":null,"column_2":null}}\n',
+            b'{"type":"RECORD","stream":"stream_1","record":{"column_1":"\xc3\x9c","column_2":null}}\n',
+        ]
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+
+        with patch('sys.stdout', stdout):
+            instance = TransformField({**self.config, 'binary_io': True})
+            instance.consume(lines)
+
+        self.assertListEqual(stdout.buffer.getvalue().splitlines(keepends=True), [
+            b'{"type": "SCHEMA", "stream": "stream_1", "schema": {"properties": {"column_1": {"type": ["null", '
+            b'"string"]}, "column_2": {"type": ["null", "string"]}}}, "key_properties": []}\n',
+            lines[1],
+            b'{"type": "RECORD", "stream": "stream_1", "record": {"column_1": null, "column_2": null}}\n',
+        ])
+
+    @patch('transform_field.VALIDATE_RECORDS', True)
+    def test_same_schema_sent_again(self):
+        schema = '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},' \
+                 '"column_2":{"type":["null","string"]}}},"key_properties":[]}\n'
+        lines = [
+            schema,
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a"}}\n',
+            schema,
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"b"}}\n',
+        ]
+
+        instance = TransformField(self.config)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock, \
+                patch('transform_field.StreamValidator', wraps=StreamValidator) as validator_mock, \
+                patch.object(instance, 'flush', wraps=instance.flush) as flush_mock:
+            instance.consume(lines)
+
+        validator_mock.assert_called_once()
+        # first schema and end of input
+        self.assertEqual(flush_mock.call_count, 2)
+        self.assertListEqual([json.loads(line)['type'] for line in stdout_mock.getvalue().splitlines()],
+                             ['SCHEMA', 'RECORD', 'SCHEMA', 'RECORD'])
+
+    def test_interleaved_streams_batched_together(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            '"column_2":{"type":["null","string"]}}},"key_properties":[]}\n',
+            '{"type":"SCHEMA","stream":"stream_3","schema":{"properties":{"id":{"type":["integer"]}}},'
+            '"key_properties":[]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a"}}\n',
+            '{"type":"RECORD","stream":"stream_3","record":{"id":1}}\n',
+            '{"type":"STATE","value":{"bookmark":1}}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"b"},"version":2}\n',
+            '{"type":"RECORD","stream":"stream_3","record":{"id":2}}\n',
+        ]
+
+        instance = TransformField(self.config)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock, \
+                patch.object(instance, 'transform_batch', wraps=instance.transform_batch) as transform_batch_mock:
+            instance.consume(lines)
+
+        # One batch per stream
+        self.assertListEqual([call[0][0] for call in transform_batch_mock.call_args_list], ['stream_1', 'stream_3'])
+
+        # Records in the same order as received, state after every record received before it
+        self.assertListEqual([json.loads(line) for line in stdout_mock.getvalue().splitlines()[2:]], [
+            {'type': 'RECORD', 'stream': 'stream_1', 'record': {'column_1': None}},
+            {'type': 'RECORD', 'stream': 'stream_3', 'record': {'id': 1}},
+            {'type': 'RECORD', 'stream': 'stream_1', 'record': {'column_1': None}, 'version': 2},
+            {'type': 'RECORD', 'stream': 'stream_3', 'record': {'id': 2}},
+            {'type': 'STATE', 'value': {'bookmark': 1}},
+        ])
+
+    def test_batch_limits(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            '"column_2":{"type":["null","string"]}}},"key_properties":[]}\n',
+        ] + ['{"type":"RECORD","stream":"stream_1","record":{"column_1":"a"}}\n'] * 10
+
+        instance = TransformField({**self.config, 'max_batch_records': 3})
+
+        with patch('sys.stdout', new_callable=io.StringIO), \
+                patch.object(instance, 'transform_batch', wraps=instance.transform_batch) as transform_batch_mock:
+            instance.consume(lines)
+
+        self.assertListEqual([len(call[0][1]) for call in transform_batch_mock.call_args_list], [3, 3, 3, 1])
+
+        instance = TransformField({**self.config, 'max_batch_records': 3, 'max_batch_latency_seconds': 60,
+                                   'batch_delay_seconds': 120})
+        self.assertEqual(instance.batch_size.records, 3)
+        self.assertEqual(instance.batch_delay_seconds, 60)
+
+        with patch('sys.stdout', new_callable=io.StringIO), \
+                patch.object(instance.batch_size, 'update', wraps=instance.batch_size.update) as update_mock:
+            instance.consume(lines)
+
+        self.assertListEqual([call[0][0] for call in update_mock.call_args_list], [3, 3, 3, 1])
+
+    def test_streaming_writes_records_immediately(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            '"column_2":{"type":["null","string"]}}},"key_properties":[]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a"}}\n',
+            '{"type":"STATE","value":{"bookmark":1}}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_2":"b"}}\n',
+            '{"type":"STATE","value":{"bookmark":2}}\n',
+        ]
+
+        instance = TransformField({**self.config, 'streaming': True})
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            for line in lines:
+                instance.handle_line(line)
+
+            self.assertListEqual(instance.messages, [])
+            instance.writer.flush()
+
+        self.assertListEqual([json.loads(line) for line in stdout_mock.getvalue().splitlines()[1:]], [
+            {'type': 'RECORD', 'stream': 'stream_1', 'record': {'column_1': None}},
+            {'type': 'STATE', 'value': {'bookmark': 1}},
+            {'type': 'RECORD', 'stream': 'stream_1', 'record': {
+                'column_2': '3e23e8160039594a33894f6564e1b1348bbd7a0088d42c4acb73eeaed59c009d'}},
+            {'type': 'STATE', 'value': {'bookmark': 2}},
+        ])
+
+    @patch('transform_field.VALIDATE_RECORDS', True)
+    def test_invalid_record_fails(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            '"column_2":{"type":["null","string"]},"column_3":{"type":["integer"]}}},"key_properties":["column_3"]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a","column_3":"b"}}\n',
+        ]
+
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException) as error:
+            TransformField(self.config).consume(lines)
+
+        self.assertTrue(str(error.exception).startswith(
+            "Record does not pass schema validation. RECORD: {'column_1': None, 'column_3': 'b'}\n"
+            "'b' is not of type 'integer'"))
+
+    @patch('transform_field.VALIDATE_RECORDS', True)
+    def test_record_missing_key_property_fails(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},'
+            '"column_2":{"type":["null","string"]},"column_3":{"type":["integer"]}}},"key_properties":["column_3"]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a"}}\n',
+        ]
+
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException) as error:
+            TransformField(self.config).consume(lines)
+
+        self.assertEqual(str(error.exception), "Record does not pass schema validation. RECORD: {'column_1': None}\n"
+                                               "Message 0 is missing key property column_3")
+
+    @patch('transform_field.VALIDATE_RECORDS', True)
+    def test_validate_transformed_properties_only(self):
+        config = {
+            'validation_scope': 'transformed',
+            'transformations': [
+                {'tap_stream_name': 'stream_1', 'field_id': 'column_1', 'type': 'HASH'},
+                {'tap_stream_name': 'stream_1', 'field_id': 'column_2', 'type': 'SET-NULL'},
+            ]
+        }
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["string"],'
+            '"maxLength":8},"column_2":{"type":["string"]},"column_3":{"type":["integer"]}}},'
+            '"key_properties":["column_3"]}\n',
+            # column_3 is not transformed, hence not validated
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a","column_3":"b"}}\n',
+        ]
+
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException) as error:
+            TransformField(config).consume(lines)
+
+        self.assertIn("is too long", str(error.exception))
+
+        # Changing column_2 to NULL breaks the schema
+        lines[1] = '{"type":"RECORD","stream":"stream_1","record":{"column_2":"a","column_3":"b"}}\n'
+
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException) as error:
+            TransformField(config).consume(lines)
+
+        self.assertIn("None is not of type 'string'", str(error.exception))
+
+        # Unchanged records are not validated
+        lines[1] = '{"type":"RECORD","stream":"stream_1","record":{"column_2":null,"column_3":"b"}}\n'
+
+        with patch('sys.stdout', new_callable=io.StringIO):
+            TransformField(config).consume(lines)
+
+    def test_validation_modes(self):
+        schema = '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]},' \
+                 '"column_2":{"type":["null","string"]},"column_3":{"type":["integer"]}}},"key_properties":[]}\n'
+        invalid_record = '{"type":"RECORD","stream":"stream_1","record":{"column_3":"b"}}\n'
+        lines = [
+            schema,
+            '{"type":"RECORD","stream":"stream_1","record":{"column_3":1}}\n',
+            invalid_record,
+        ]
+
+        # Validation is off by default
+        with patch('sys.stdout', new_callable=io.StringIO):
+            TransformField(self.config).consume(lines)
+
+        # Only the first record after the schema is validated
+        config = {**self.config, 'validation_mode': 'full', 'stream_validation_modes': {'stream_1': 'first:1'}}
+        with patch('sys.stdout', new_callable=io.StringIO):
+            TransformField(config).consume(lines)
+
+        # Schema sent again, the first record after it is validated
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException):
+            TransformField(config).consume(lines + [schema, invalid_record])
+
+        # Every second record is validated
+        config['stream_validation_modes'] = {'stream_1': 'sample:2'}
+        with patch('sys.stdout', new_callable=io.StringIO):
+            TransformField(config).consume(lines)
+
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException):
+            TransformField(config).consume(lines + [invalid_record])
+
+        # Every record is validated
+        config['stream_validation_modes'] = {}
+        with patch('sys.stdout', new_callable=io.StringIO), self.assertRaises(TransformFieldException):
+            TransformField(config).consume(lines)
+
+    def test_init_with_invalid_validation_mode_fails(self):
+        with self.assertRaises(TransformFieldException):
+            TransformField({**self.config, 'stream_validation_modes': {'stream_1': 'sample:0'}})
+
+    def test_init_with_unknown_validation_scope_fails(self):
+        with self.assertRaises(TransformFieldException):
+            TransformField({**self.config, 'validation_scope': 'everything'})
 
     def test_validate_without_catalog_fails(self):
         with self.assertRaises(CatalogRequiredException):
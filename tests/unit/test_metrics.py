@@ -0,0 +1,199 @@
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import unittest
+
+from unittest.mock import MagicMock, patch
+
+from transform_field import TransformField
+from transform_field.metrics import LatencyHistogram, LatencyTracker, Metrics
+from transform_field.timings import Timings
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Unit Tests for the metrics and timings modules
+    """
+
+    @staticmethod
+    def get_points(logger):
+        """Parse the metrics logged by a mock logger"""
+        return [json.loads(call[0][1]) for call in logger.info.call_args_list if call[0][0] == 'METRIC: %s']
+
+    def test_timings(self):
+        timings = Timings(MagicMock())
+
+        with timings.mode('transforming'):
+            pass
+
+        with self.assertRaises(ValueError), timings.mode('writing'):
+            raise ValueError()
+
+        timings.add('parsing', 1.5)
+        timings.log_timings()
+
+        self.assertEqual(timings.timings['parsing'], 1.5)
+        self.assertGreater(timings.timings['transforming'], 0)
+        self.assertGreater(timings.timings['writing'], 0)
+        self.assertEqual(timings.timings['validating'], 0)
+        timings.logger.debug.assert_called_once()
+
+    def test_metrics(self):
+        logger = MagicMock()
+        timings = Timings(logger)
+        metrics = Metrics(logger, timings, interval_seconds=3600)
+
+        metrics.count('stream_1', 10)
+        metrics.count('stream_1', 20)
+        metrics.count('stream_2', 5)
+        timings.add('transforming', 2)
+
+        metrics.log_if_due()
+        self.assertListEqual(self.get_points(logger), [])
+
+        metrics.log()
+        points = self.get_points(logger)
+
+        self.assertIn({'type': 'counter', 'metric': 'record_count', 'value': 2, 'tags': {'stream': 'stream_1'}},
+                      points)
+        self.assertIn({'type': 'counter', 'metric': 'byte_count', 'value': 30, 'tags': {'stream': 'stream_1'}},
+                      points)
+        self.assertIn({'type': 'counter', 'metric': 'record_count', 'value': 1, 'tags': {'stream': 'stream_2'}},
+                      points)
+        self.assertIn({'type': 'timer', 'metric': 'phase_duration', 'value': 2, 'tags': {'phase': 'transforming'}},
+                      points)
+        self.assertEqual(len([point for point in points if point['metric'] == 'records_per_second']), 2)
+
+        # Counters are reset after logging
+        logger.reset_mock()
+        metrics.count('stream_2', 5)
+        metrics.log()
+        points = self.get_points(logger)
+
+        self.assertListEqual([point for point in points if point['metric'] == 'record_count'],
+                             [{'type': 'counter', 'metric': 'record_count', 'value': 1, 'tags': {'stream': 'stream_2'}}])
+        self.assertIn({'type': 'timer', 'metric': 'phase_duration', 'value': 0, 'tags': {'phase': 'transforming'}},
+                      points)
+
+    def test_records_counted_by_stream(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"id":{"type":["integer"]}}},'
+            '"key_properties":[]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"id":1}}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"id":2}}\n',
+            '{"type":"STATE","value":{"id":2}}\n',
+        ]
+
+        instance = TransformField({'transformations': []})
+
+        with patch('sys.stdout', new_callable=io.StringIO), patch.object(instance.metrics, 'log') as log_mock:
+            instance.consume(lines)
+
+        self.assertDictEqual(instance.metrics.streams, {'stream_1': [2, len(lines[1]) + len(lines[2])]})
+        log_mock.assert_called_once()
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+
+        for micros in range(1, 10001):
+            histogram.record(micros / 1000000)
+
+        summary = histogram.percentiles()
+
+        self.assertEqual(summary['count'], 10000)
+        self.assertEqual(summary['max'], 0.01)
+        # Percentiles are accurate to 1%, see test_latency_histogram_percentiles_bound
+        self.assertAlmostEqual(summary['p50'], 0.005, delta=0.005 * 0.01)
+        self.assertAlmostEqual(summary['p90'], 0.009, delta=0.009 * 0.01)
+        self.assertAlmostEqual(summary['p99'], 0.0099, delta=0.0099 * 0.01)
+        # Buckets are bounded
+        self.assertLess(len(histogram.buckets), 1000)
+
+    def test_latency_histogram_percentiles_bound(self):
+        # Log-normal durations of whole microseconds, from a few microseconds to minutes
+        rand = random.Random(1)
+        durations = sorted(round(rand.lognormvariate(9, 3)) + 1 for _ in range(100000))
+        histogram = LatencyHistogram()
+
+        for micros in durations:
+            histogram.record(micros / 1000000)
+
+        summary = histogram.percentiles()
+
+        for percentile in (50, 99):
+            actual = durations[math.ceil(len(durations) * percentile / 100) - 1] / 1000000
+            # Reported at the lowest duration of the bucket, the bucket being narrower than 1/128 of it
+            self.assertLessEqual(summary[f'p{percentile}'], actual)
+            self.assertGreater(summary[f'p{percentile}'], actual * (1 - 1 / 128))
+
+        # Durations at the end of buckets are reported lowest
+        for micros in (2 ** 16 + 2 ** 9 - 1, 2 ** 16 + 2 ** 10 - 1, 2 ** 20 - 1):
+            histogram = LatencyHistogram()
+            histogram.record(micros / 1000000)
+            self.assertGreater(histogram.percentiles()['p50'], micros / 1000000 * (1 - 1 / 128))
+
+    def test_empty_latency_histogram(self):
+        self.assertDictEqual(LatencyHistogram().percentiles(), {'count': 0, 'p50': 0, 'p90': 0, 'p99': 0, 'max': 0})
+
+    def test_latency_tracked_by_stream(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"id":{"type":["integer"]}}},'
+            '"key_properties":[]}\n',
+            '{"type":"SCHEMA","stream":"stream_2","schema":{"properties":{"id":{"type":["integer"]}}},'
+            '"key_properties":[]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"id":1}}\n',
+            '{"type":"RECORD","stream":"stream_2","record":{"id":1}}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"id":2}}\n',
+        ]
+
+        for streaming in (False, True):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                metrics_path = os.path.join(temp_dir, 'latency.json')
+                instance = TransformField({'transformations': [], 'streaming': streaming,
+                                           'latency_metrics_file': metrics_path})
+                self.assertIsInstance(instance.latency, LatencyTracker)
+
+                with patch('sys.stdout', new_callable=io.StringIO):
+                    instance.consume(lines)
+
+                with open(metrics_path, 'r', encoding='utf-8') as metrics_file:
+                    streams = json.load(metrics_file)['streams']
+
+            self.assertEqual(streams['stream_1']['record_latency_seconds']['count'], 2)
+            self.assertEqual(streams['stream_2']['record_latency_seconds']['count'], 1)
+
+            if streaming:
+                self.assertIsNone(streams['stream_1']['flush_duration_seconds'])
+            else:
+                self.assertEqual(streams['stream_1']['flush_duration_seconds']['count'], 1)
+
+        self.assertIsNone(TransformField({'transformations': []}).latency)
+
+    @patch('transform_field.metrics.time.monotonic')
+    def test_latency_of_record_buffered_while_idle(self, monotonic_mock):
+        instance = TransformField({'transformations': [], 'track_latency': True, 'batch_delay_seconds': 3600})
+        monotonic_mock.return_value = 100
+
+        with patch('sys.stdout', new_callable=io.StringIO):
+            instance.handle_line('{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"id":{"type":'
+                                 '["integer"]}}},"key_properties":[]}\n')
+            instance.handle_line('{"type":"RECORD","stream":"stream_1","record":{"id":1}}\n')
+
+            # The record stays buffered, its latency isn't finished by the idle flushes
+            for now in (101, 102, 103):
+                monotonic_mock.return_value = now
+                instance.flush_idle()
+
+            self.assertEqual(len(instance.messages), 1)
+            self.assertEqual(len(instance.latency.pending), 1)
+            self.assertDictEqual(instance.latency.record_latency, {})
+
+            monotonic_mock.return_value = 110
+            instance.flush()
+
+        latency = instance.latency.report()['stream_1']['record_latency_seconds']
+        self.assertEqual(latency['count'], 1)
+        self.assertEqual(latency['max'], 10)
@@ -0,0 +1,78 @@
+import io
+import unittest
+
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import singer
+
+from transform_field import codec
+from transform_field.output import OutputWriter
+
+
+class TestOutputWriter(unittest.TestCase):
+    """
+    Unit Tests for the OutputWriter class
+    """
+
+    def test_format_message_same_as_singer(self):
+        message = singer.RecordMessage('stream_1', {'id': 1, 'amount': Decimal('1.50'), 'name': 'Ü'}, version=3)
+
+        self.assertEqual(codec.format_message(message), singer.format_message(message))
+
+    def test_format_message_with_datetime(self):
+        message = singer.RecordMessage('stream_1', {'created_at': datetime(2021, 3, 1, 12, tzinfo=timezone.utc)})
+
+        self.assertEqual(codec.format_message(message),
+                         '{"type": "RECORD", "stream": "stream_1", "record": {"created_at": "2021-03-01T12:00:00+00:00"}}')
+
+    def test_writes_only_on_flush(self):
+        writer = OutputWriter()
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            writer.write_message(singer.StateMessage({'bookmark': 1}))
+            writer.write_line('{"type": "STATE", "value": {"bookmark": 2}}')
+
+            self.assertEqual(stdout_mock.getvalue(), '')
+
+            writer.flush()
+
+        self.assertEqual(stdout_mock.getvalue(),
+                         '{"type": "STATE", "value": {"bookmark": 1}}\n{"type": "STATE", "value": {"bookmark": 2}}\n')
+        self.assertListEqual(writer.lines, [])
+        self.assertEqual(writer.buffer_size_bytes, 0)
+
+    def test_writes_when_buffer_is_full(self):
+        writer = OutputWriter(max_buffer_bytes=20)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            writer.write_line('0123456789\n')
+            self.assertEqual(stdout_mock.getvalue(), '')
+
+            writer.write_line('0123456789\n')
+            self.assertEqual(stdout_mock.getvalue(), '0123456789\n0123456789\n')
+
+    def test_binary_mode(self):
+        writer = OutputWriter(binary=True)
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+
+        with patch('sys.stdout', stdout):
+            writer.write_line(b'{"type": "STATE", "value": {"name": "\xc3\x9c"}}')
+            writer.write_message(singer.StateMessage({'name': 'Ü'}))
+            writer.flush()
+
+        self.assertEqual(stdout.buffer.getvalue(),
+                         b'{"type": "STATE", "value": {"name": "\xc3\x9c"}}\n'
+                         b'{"type": "STATE", "value": {"name": "\\u00dc"}}\n')
+
+    def test_single_write_per_flush(self):
+        writer = OutputWriter()
+
+        with patch('sys.stdout') as stdout_mock:
+            for i in range(100):
+                writer.write_message(singer.RecordMessage('stream_1', {'id': i}))
+            writer.flush()
+
+        stdout_mock.write.assert_called_once()
+        stdout_mock.flush.assert_called_once()
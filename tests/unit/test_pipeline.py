@@ -0,0 +1,175 @@
+import io
+import json
+import os
+import threading
+import time
+import unittest
+
+from unittest.mock import patch, MagicMock
+
+from transform_field import pipeline, TransformField
+
+RESOURCES_DIR = os.path.join(os.path.dirname(__file__), '..', 'integration', 'resources')
+
+
+class TestPipeline(unittest.TestCase):
+    """
+    Unit Tests for the pipeline module
+    """
+
+    def test_read_in_background_keeps_order(self):
+        lines = [f'line {i}\n' for i in range(1000)]
+
+        self.assertListEqual(list(pipeline.read_in_background(iter(lines), max_queue_size=2, chunk_lines=7)), lines)
+
+    def test_read_in_background_raises_reader_exception(self):
+        def reader():
+            yield 'line 1\n'
+            raise IOError('Cannot read')
+
+        with self.assertRaises(IOError):
+            list(pipeline.read_in_background(reader(), chunk_lines=1))
+
+    def test_read_in_background_stops_reader(self):
+        lines = pipeline.read_in_background(iter(range(100000)), max_queue_size=1, chunk_lines=1)
+
+        self.assertEqual(next(lines), 0)
+        lines.close()
+
+    def test_threaded_output_writer(self):
+        writer = pipeline.ThreadedOutputWriter(max_buffer_bytes=10, max_queue_size=1)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            for i in range(100):
+                writer.write_line(f'line {i}')
+            writer.flush()
+            writer.join()
+
+        self.assertEqual(stdout_mock.getvalue(), ''.join(f'line {i}\n' for i in range(100)))
+        self.assertFalse(writer.thread.is_alive())
+
+    def test_threaded_output_writer_raises_write_exception(self):
+        writer = pipeline.ThreadedOutputWriter()
+        stdout = MagicMock()
+        stdout.write.side_effect = BrokenPipeError()
+
+        with patch('sys.stdout', stdout):
+            writer.write_line('line 1')
+            writer.flush()
+
+            with self.assertRaises(BrokenPipeError):
+                writer.join()
+
+    def test_pipelined_output_same_as_sequential(self):
+        with open(os.path.join(RESOURCES_DIR, 'messages.json'), 'r', encoding='utf-8') as messages_file:
+            lines = messages_file.readlines()
+
+        config = {'transformations': [
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_2', 'type': 'HASH'},
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_5', 'type': 'MASK-DATE'},
+        ]}
+
+        outputs = []
+        for pipelined in (False, True):
+            with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+                TransformField({**config, 'pipelined': pipelined}).consume(lines)
+
+            outputs.append(stdout_mock.getvalue())
+
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_streaming_output_same_records_as_batched(self):
+        with open(os.path.join(RESOURCES_DIR, 'messages.json'), 'r', encoding='utf-8') as messages_file:
+            lines = messages_file.readlines()
+
+        config = {'transformations': [
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_2', 'type': 'HASH'},
+            {'tap_stream_name': 'dummy_stream', 'field_id': 'column_5', 'type': 'MASK-DATE'},
+        ]}
+
+        outputs = []
+        for streaming, pipelined in ((False, False), (True, False), (True, True)):
+            with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+                TransformField({**config, 'streaming': streaming, 'pipelined': pipelined}).consume(lines)
+
+            # State messages are written immediately in streaming mode, and only with every batch otherwise
+            outputs.append([line for line in stdout_mock.getvalue().splitlines()
+                            if json.loads(line)['type'] != 'STATE'])
+
+        self.assertListEqual(outputs[0], outputs[1])
+        self.assertListEqual(outputs[0], outputs[2])
+
+    def test_flush_timer(self):
+        called = threading.Event()
+        timer = pipeline.FlushTimer(0.001, called.set)
+
+        self.assertTrue(called.wait(5))
+        timer.stop()
+
+        self.assertFalse(timer.thread.is_alive())
+        self.assertIsNone(timer.error)
+
+    def test_flush_timer_keeps_error(self):
+        callback = MagicMock(side_effect=IOError('Cannot write'))
+        timer = pipeline.FlushTimer(0.001, callback)
+        timer.thread.join(5)
+
+        self.assertIsInstance(timer.error, IOError)
+        callback.assert_called_once()
+        timer.stop()
+
+        with self.assertRaises(IOError):
+            timer.raise_error()
+
+    def test_read_in_background_stops_on_check_error(self):
+        def reader():
+            yield 'line'
+            # No more input for a long time
+            time.sleep(10)
+
+        check = MagicMock(side_effect=IOError('Cannot write'))
+        lines = pipeline.read_in_background(reader(), check=check)
+
+        self.assertEqual(next(lines), 'line')
+        with self.assertRaises(IOError):
+            next(lines)
+
+    def test_failed_idle_flush_stops_consuming(self):
+        def reader():
+            yield '{"type": "STATE", "value": {"bookmark": 1}}\n'
+            # No more input for a long time
+            time.sleep(10)
+
+        instance = TransformField({'transformations': [], 'flush_interval_seconds': 0.001})
+        started = time.monotonic()
+
+        with patch.object(instance, 'flush_idle', side_effect=IOError('Broken pipe')), \
+                patch('sys.stdout', new_callable=io.StringIO), \
+                patch('transform_field.pipeline.LOGGER') as logger:
+            with self.assertRaises(IOError):
+                instance.consume(reader())
+
+        self.assertLess(time.monotonic() - started, 5)
+        logger.critical.assert_called_once()
+
+    @patch('transform_field.DEFAULT_BATCH_DELAY_SECONDS', 0.05)
+    def test_idle_buffers_flushed_by_timer(self):
+        with open(os.path.join(RESOURCES_DIR, 'messages.json'), 'r', encoding='utf-8') as messages_file:
+            lines = messages_file.readlines()[:4]
+
+        flushed_while_idle = []
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            def reader():
+                yield from lines
+
+                # No more input for a while, the buffered record has to be written meanwhile
+                deadline = time.time() + 5
+                while '"RECORD"' not in stdout_mock.getvalue() and time.time() < deadline:
+                    time.sleep(0.001)
+
+                flushed_while_idle.append('"RECORD"' in stdout_mock.getvalue())
+
+            TransformField({'transformations': [], 'flush_interval_seconds': 0.001}).consume(reader())
+
+        self.assertListEqual(flushed_while_idle, [True])
@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from unittest.mock import patch
+
+from transform_field import TransformField, transform
+from transform_field.profiling import RuleProfiler
+
+
+class TestProfiling(unittest.TestCase):
+    """
+    Unit Tests for the profiling module
+    """
+
+    def test_profile_transformation(self):
+        profiler = RuleProfiler()
+        apply_transformation = transform.compile_transformation(
+            'column_1', 'MASK-NUMBER', [{'column': 'column_2', 'equals': 'x'}],
+            profile=profiler.add('stream_1', 'column_1', 'MASK-NUMBER'))
+
+        for record in [
+                {'column_1': 5, 'column_2': 'x'},
+                {'column_1': 0, 'column_2': 'x'},
+                {'column_1': 5, 'column_2': 'y'},
+                {'column_2': 'x'},
+        ]:
+            apply_transformation(record)
+
+        self.assertDictEqual(profiler.report()['rules'][0], {
+            'tap_stream_name': 'stream_1',
+            'field_id': 'column_1',
+            'type': 'MASK-NUMBER',
+            'evaluations': 4,
+            'when_matches': 2,
+            'changes': 1,
+            'errors': 0,
+            'seconds': profiler.profiles[0].asdict()['seconds'],
+        })
+
+    def test_profile_swallowed_errors(self):
+        profiler = RuleProfiler()
+        trans_plan = transform.compile_trans_plan({
+            'stream_1': [('column_1', 'MASK-DATE', None, None), ('column_2', 'SET-NULL', None, None)],
+        }, profiler)
+
+        for apply_transformation in trans_plan['stream_1']:
+            apply_transformation({'column_1': 'not a date', 'column_2': 'a'})
+
+        rules = {rule['field_id']: rule for rule in profiler.report()['rules']}
+        self.assertEqual(rules['column_1']['errors'], 1)
+        self.assertEqual(rules['column_1']['changes'], 0)
+        self.assertEqual(rules['column_2']['errors'], 0)
+        self.assertEqual(rules['column_2']['changes'], 1)
+
+    def test_report_written_at_the_end(self):
+        lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"column_1":{"type":["null","string"]}}},'
+            '"key_properties":[]}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":"a"}}\n',
+            '{"type":"RECORD","stream":"stream_1","record":{"column_1":null}}\n',
+        ]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            report_path = os.path.join(temp_dir, 'profile.json')
+            config = {
+                'transformations': [{'tap_stream_name': 'stream_1', 'field_id': 'column_1', 'type': 'SET-NULL'}],
+                'rule_profile_file': report_path,
+                'workers': 2,
+            }
+
+            instance = TransformField(config)
+            self.assertIsNone(instance.pool)
+
+            with patch('sys.stdout', new_callable=io.StringIO):
+                instance.consume(lines)
+
+            with open(report_path, 'r', encoding='utf-8') as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(len(report['rules']), 1)
+        self.assertEqual(report['rules'][0]['evaluations'], 2)
+        self.assertEqual(report['rules'][0]['changes'], 1)
@@ -0,0 +1,111 @@
+import io
+import json
+import unittest
+
+from unittest.mock import patch
+
+from transform_field import TransformField, TransformFieldException
+from transform_field.output import OutputWriter
+from transform_field.state import parse_state_emission, StateEmitter
+
+
+class TestState(unittest.TestCase):
+    """
+    Unit Tests for the state module
+    """
+
+    def setUp(self) -> None:
+        self.lines = [
+            '{"type":"SCHEMA","stream":"stream_1","schema":{"properties":{"id":{"type":["integer"]}}},'
+            '"key_properties":[]}\n',
+        ]
+
+        for i in range(1, 7):
+            self.lines.append(f'{{"type":"RECORD","stream":"stream_1","record":{{"id":{i}}}}}\n')
+            self.lines.append(f'{{"type":"STATE","value":{{"id":{i}}}}}\n')
+
+    def consume(self, config):
+        """Consume the lines and return the ids of the written records and states"""
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout_mock:
+            TransformField({'transformations': [], **config}).consume(self.lines)
+
+        messages = [json.loads(line) for line in stdout_mock.getvalue().splitlines()[1:]]
+        return [(message['type'], message.get('record', message.get('value'))['id']) for message in messages]
+
+    def test_parse_state_emission(self):
+        self.assertEqual(parse_state_emission('flush'), ('flush', None))
+        self.assertEqual(parse_state_emission('records:100'), ('records', 100))
+        self.assertEqual(parse_state_emission('seconds:0.5'), ('seconds', 0.5))
+
+        for policy in ['', 'flush:1', 'records', 'records:0', 'records:1.5', 'seconds:x', 'seconds:-1', 'always']:
+            with self.assertRaises(ValueError):
+                parse_state_emission(policy)
+
+    def test_state_emitter(self):
+        writer = OutputWriter()
+        emitter = StateEmitter(writer, 'records:2')
+
+        emitter.add({'id': 1})
+        emitter.record_written()
+        self.assertEqual(len(writer.lines), 0)
+
+        emitter.record_written()
+        self.assertEqual(len(writer.lines), 1)
+        self.assertIsNone(emitter.state)
+
+        # Written with every batch under every policy
+        emitter.add({'id': 2})
+        emitter.flushed()
+        self.assertEqual(len(writer.lines), 2)
+        self.assertEqual(emitter.records, 0)
+
+        emitter.add({'id': 3})
+        emitter.record_written()
+        emitter.idle()
+        self.assertEqual(len(writer.lines), 2)
+
+        emitter.finish()
+        self.assertEqual(len(writer.lines), 3)
+        self.assertEqual(emitter.records, 0)
+
+    def test_emit_state_with_every_batch(self):
+        self.assertListEqual(self.consume({'max_batch_records': 4}), [
+            ('RECORD', 1), ('RECORD', 2), ('RECORD', 3), ('RECORD', 4), ('STATE', 3),
+            ('RECORD', 5), ('RECORD', 6), ('STATE', 6),
+        ])
+
+    def test_emit_state_every_records(self):
+        # States are written within batches, never before a record received before them
+        self.assertListEqual(self.consume({'state_emission': 'records:2'}), [
+            ('RECORD', 1), ('RECORD', 2), ('STATE', 1),
+            ('RECORD', 3), ('RECORD', 4), ('STATE', 3),
+            ('RECORD', 5), ('RECORD', 6), ('STATE', 5), ('STATE', 6),
+        ])
+
+        # Also written with every batch, not held until N records while the source is quiet
+        self.assertListEqual(self.consume({'state_emission': 'records:100', 'max_batch_records': 4}), [
+            ('RECORD', 1), ('RECORD', 2), ('RECORD', 3), ('RECORD', 4), ('STATE', 3),
+            ('RECORD', 5), ('RECORD', 6), ('STATE', 6),
+        ])
+
+        # Every message is a batch of its own in streaming mode
+        self.assertListEqual(self.consume({'state_emission': 'records:2', 'streaming': True}), [
+            ('RECORD', 1), ('STATE', 1), ('RECORD', 2), ('STATE', 2), ('RECORD', 3), ('STATE', 3),
+            ('RECORD', 4), ('STATE', 4), ('RECORD', 5), ('STATE', 5), ('RECORD', 6), ('STATE', 6),
+        ])
+
+    def test_emit_state_every_seconds(self):
+        self.assertListEqual(self.consume({'state_emission': 'seconds:0'}), [
+            ('RECORD', 1), ('RECORD', 2), ('STATE', 1),
+            ('RECORD', 3), ('STATE', 2), ('RECORD', 4), ('STATE', 3),
+            ('RECORD', 5), ('STATE', 4), ('RECORD', 6), ('STATE', 5), ('STATE', 6),
+        ])
+
+        self.assertListEqual(self.consume({'state_emission': 'seconds:3600', 'max_batch_records': 4}), [
+            ('RECORD', 1), ('RECORD', 2), ('RECORD', 3), ('RECORD', 4), ('STATE', 3),
+            ('RECORD', 5), ('RECORD', 6), ('STATE', 6),
+        ])
+
+    def test_init_with_invalid_state_emission_fails(self):
+        with self.assertRaises(TransformFieldException):
+            TransformField({'transformations': [], 'state_emission': 'records:0'})
@@ -1,7 +1,15 @@
+import copy
 import unittest
 import hashlib
+import itertools
+
+from dateutil import parser
+from dpath.util import get as get_xpath
+from unittest.mock import patch
 
 from transform_field import transform
+from transform_field.errors import InvalidTransformationException
+from transform_field.profiling import RuleProfiler
 
 
 class TestTransform(unittest.TestCase):
@@ -45,6 +53,38 @@ class TestTransform(unittest.TestCase):
             "2019-05-21T13:34:99"
         )
 
+    def test_mask_date_same_as_dateutil(self):
+        """Test the fast path of MASK-DATE gives the same result as dateutil for every format"""
+        def mask_date_with_dateutil(value):
+            try:
+                return parser.parse(value).replace(month=1, day=1).isoformat()
+            except (ValueError, OverflowError):
+                return None
+
+        def mask_date(value):
+            try:
+                return transform.VALUE_TRANSFORMERS['MASK-DATE'](value)
+            except (ValueError, OverflowError):
+                return None
+
+        dates = ['2020-05-17', '2020-02-29', '2021-02-29', '2021-04-31', '2020-13-01', '2020-00-10', '0000-01-01',
+                 '0001-01-01', '9999-12-31', '1900-02-29', '2000-02-29', '20200517', '2020-5-17', '2020-05',
+                 '2020-W20-1', '2020/05/17', '']
+        times = ['', 'T10:11:12', 'T10:11', 'T00:00:00', 'T23:59:59', 'T10:11:12.5', 'T10:11:12.000',
+                 'T10:11:12.000001', 'T10:11:12.123456', 'T10:11:12.1234567', 'T10:11:12,5', ' 10:11:12',
+                 'T24:00:00', 'T23:59:60', 'T10:60:00', 't10:11:12', 'T10:11:12.']
+        offsets = ['', 'Z', 'z', '+00:00', '-00:00', '+02:00', '-05:30', '+0530', '+05', '+23:59', '+24:00',
+                   '+05:60', ' UTC']
+
+        fast = 0
+        for date, time, offset in itertools.product(dates, times, offsets):
+            value = date + time + offset
+            fast += transform._mask_iso_date(value) is not None  # pylint: disable=protected-access
+            self.assertEqual(mask_date(value), mask_date_with_dateutil(value), value)
+
+        # The fast path is actually taken
+        self.assertGreater(fast, 200)
+
     def test_mask_number(self):
         """Test MASK-NUMBER transformation"""
         self.assertEqual(
@@ -353,3 +393,276 @@ class TestTransform(unittest.TestCase):
             )
         )
 
+
+    def test_compile_transformation(self):
+        """Test compiled transformation is applied to the record in place"""
+        record = {'col_1': 'John', 'col_2': 'Smith'}
+
+        self.assertTrue(transform.compile_transformation('col_1', 'HASH-SKIP-FIRST-2')(record))
+        self.assertDictEqual(
+            {'col_1': 'Jo' + hashlib.sha256('hn'.encode('utf-8')).hexdigest(), 'col_2': 'Smith'},
+            record
+        )
+
+    def test_compile_transformation_with_missing_column(self):
+        """Test compiled transformation is not applied if the column is not in the record"""
+        record = {'col_2': 'Smith'}
+
+        self.assertFalse(transform.compile_transformation('col_1', 'SET-NULL')(record))
+        self.assertDictEqual({'col_2': 'Smith'}, record)
+
+    def test_compile_transformation_with_conditions(self):
+        """Test compiled transformation is applied only if the conditions are met"""
+        apply_transformation = transform.compile_transformation(
+            'col_1', 'MASK-HIDDEN', [{'column': 'col_2', 'regex_match': '^S'}])
+
+        record = {'col_1': 'John', 'col_2': 'Smith'}
+        self.assertTrue(apply_transformation(record))
+        self.assertDictEqual({'col_1': 'hidden', 'col_2': 'Smith'}, record)
+
+        record = {'col_1': 'John', 'col_2': 'Doe'}
+        self.assertFalse(apply_transformation(record))
+        self.assertDictEqual({'col_1': 'John', 'col_2': 'Doe'}, record)
+
+    def test_compile_transformation_with_field_paths(self):
+        """Test compiled transformation of fields in a json column"""
+        record = {'col_1': {'id': 1, 'info': {'last_name': 'Smith', 'first_name': 'John'}}}
+
+        self.assertTrue(transform.compile_transformation(
+            'col_1', 'MASK-HIDDEN', None, ['info/last_name', 'info/middle_name'])(record))
+        self.assertDictEqual({'col_1': {'id': 1, 'info': {'last_name': 'hidden', 'first_name': 'John'}}}, record)
+
+    def test_compile_transformation_keeps_value_if_cannot_transform(self):
+        """Test compiled transformation keeps the original value if the transformation fails"""
+        record = {'col_1': '2019-05-21T13:34:99'}
+
+        self.assertFalse(transform.compile_transformation('col_1', 'MASK-DATE')(record))
+        self.assertDictEqual({'col_1': '2019-05-21T13:34:99'}, record)
+
+    def test_compile_transformation_with_unchanged_value(self):
+        """Test compiled transformation reports no change if the transformed value is the same"""
+        self.assertFalse(transform.compile_transformation('col_1', 'SET-NULL')({'col_1': None}))
+        self.assertFalse(transform.compile_transformation('col_1', 'MASK-HIDDEN')({'col_1': 'hidden'}))
+        self.assertTrue(transform.compile_transformation('col_1', 'MASK-NUMBER')({'col_1': 0.0}))
+
+    def test_get_value_transformer_with_invalid_parameter(self):
+        """Test parametrised transformation type with invalid parameter returns the original value"""
+        self.assertEqual('John', transform.get_value_transformer('HASH-SKIP-FIRST-X')('John'))
+
+    def test_compile_conditions_without_conditions(self):
+        """Test transformation is always required if there are no conditions"""
+        self.assertTrue(transform.compile_conditions(None)({'col_1': 'John'}))
+        self.assertTrue(transform.compile_conditions([])({'col_1': 'John'}))
+
+    def test_compile_conditions_compiles_regex_once(self):
+        """Test regex patterns are compiled when the conditions are compiled and not per record"""
+        with patch('transform_field.transform.re.compile', wraps=transform.re.compile) as compile_mock:
+            is_required = transform.compile_conditions([{'column': 'col_1', 'regex_match': '^J'}])
+
+            self.assertTrue(is_required({'col_1': 'John'}))
+            self.assertFalse(is_required({'col_1': 'Bob'}))
+            self.assertEqual(compile_mock.call_count, 1)
+
+    def test_compile_conditions_stops_at_first_unmet_condition(self):
+        """Test conditions after the first unmet one are not evaluated"""
+        is_required = transform.compile_conditions([
+            {'column': 'col_1', 'equals': 'John'},
+            {'column': 'col_2', 'regex_match': 'Smith'},
+        ])
+
+        # regex on a non-string value would raise an exception if evaluated
+        self.assertFalse(is_required({'col_1': 'Bob', 'col_2': 123}))
+        self.assertTrue(is_required({'col_1': 'John', 'col_2': 'Mr Smith'}))
+
+    def test_compile_conditions_with_field_path(self):
+        """Test conditions on a field in a json column"""
+        is_required = transform.compile_conditions([
+            {'column': 'col_1', 'field_path': 'info/last_name', 'equals': 'Smith'}
+        ])
+
+        self.assertTrue(is_required({'col_1': {'info': {'last_name': 'Smith'}}}))
+        self.assertFalse(is_required({'col_1': {'info': {'last_name': 'Doe'}}}))
+        self.assertFalse(is_required({'col_1': {'info': {}}}))
+
+    def test_compile_conditions_without_operation(self):
+        """Test transformation is not required if no condition has an equals or regex_match operation"""
+        self.assertFalse(transform.compile_conditions([{'column': 'col_1', 'equals': 0}])({'col_1': 0}))
+
+    def test_compile_conditions_with_invalid_regex_fails(self):
+        """Test invalid regex patterns fail when compiling the conditions"""
+        with self.assertRaises(InvalidTransformationException):
+            transform.compile_conditions([{'column': 'col_1', 'regex_match': '(unclosed'}])
+
+    def test_compile_conditions_without_column_fails(self):
+        """Test conditions without column fail when compiling the conditions"""
+        with self.assertRaises(InvalidTransformationException):
+            transform.compile_conditions([{'equals': 'John'}])
+
+    def test_compile_field_path_getter_same_as_dpath(self):
+        """Test compiled field path getters find the same values as dpath"""
+        obj = {'a': {'b': 1, 'c': [{'x': 1}, {'x': 2}], '1': 'one', 's': 'str', 'n': None}, 'a/b': 2}
+        field_paths = ['a/b', '/a/b', 'a/b/', 'a//b', 'a', 'a/c/0/x', 'a/c/1/x', 'a/c/01/x', 'a/c/-1/x', 'a/c/2/x',
+                       'a/1', 'a/01', 'a/s/0', 'a/n', 'a/n/x', 'a/b/x', 'a/c/0', 'a/?', 'a/[bc]', '/', '', 'x']
+
+        def get(getter, field_path):
+            try:
+                return getter(obj, field_path)
+            except (KeyError, ValueError) as exc:
+                return type(exc)
+
+        for field_path in field_paths:
+            self.assertEqual(get(lambda o, p: transform.compile_field_path_getter(p)(o), field_path),
+                             get(get_xpath, field_path), field_path)
+
+        for field_path, root in [('a', ''), ('a', None), ('1/a', [1, {'a': 1}]), ('a', [1])]:
+            self.assertEqual(get(lambda o, p: transform.compile_field_path_getter(p)(root), field_path),
+                             get(lambda o, p: get_xpath(root, p), field_path), field_path)
+
+    def test_compile_field_path_updater(self):
+        """Test compiled field path updaters transform values in place"""
+        obj = {'a': {'b': 'x', 'c': [{'d': 'y'}, {'d': 'z'}]}}
+
+        self.assertTrue(transform.compile_field_path_updater('a/b')(obj, str.upper))
+        self.assertTrue(transform.compile_field_path_updater('a/c/1/d')(obj, str.upper))
+        self.assertFalse(transform.compile_field_path_updater('a/b')(obj, str.upper))
+        self.assertDictEqual({'a': {'b': 'X', 'c': [{'d': 'y'}, {'d': 'Z'}]}}, obj)
+
+        for field_path in ['a/x', 'a/c/2/d', 'a/b/x', 'b']:
+            with self.assertRaises(KeyError):
+                transform.compile_field_path_updater(field_path)(obj, str.upper)
+
+        # Glob paths are matched by dpath
+        self.assertTrue(transform.compile_field_path_updater('a/c/0/?')(obj, str.upper))
+        self.assertDictEqual({'a': {'b': 'X', 'c': [{'d': 'Y'}, {'d': 'Z'}]}}, obj)
+
+    def test_group_field_paths_transformations(self):
+        """Test only independent transformations of nested fields of the same column are grouped"""
+        rules = [
+            ('col_1', 'HASH', None, ['a/b'], None),
+            ('col_2', 'SET-NULL', None, None, None),
+            ('col_1', 'MASK-HIDDEN', [{'column': 'col_3', 'equals': 'x'}], ['a/c'], None),
+            # Depends on a column transformed in between
+            ('col_1', 'MASK-HIDDEN', [{'column': 'col_2', 'equals': 'x'}], ['a/d'], None),
+            # Depends on its own column
+            ('col_1', 'MASK-HIDDEN', [{'column': 'col_1', 'field_path': 'a/b', 'equals': 'x'}], ['a/e'], None),
+            # Field path prefix of another one
+            ('col_1', 'SET-NULL', None, ['a'], None),
+            # Glob field path
+            ('col_1', 'SET-NULL', None, ['a/*'], None),
+        ]
+
+        groups = transform.group_field_paths_transformations(rules)
+
+        self.assertListEqual(groups, [[rules[0], rules[2]], [rules[1]], [rules[3]], [rules[4]], [rules[5]], [rules[6]]])
+
+    def test_compile_field_paths_transformations(self):
+        """Test grouped transformations give the same result as applying them one by one"""
+        rules = [
+            ('col_1', 'MASK-HIDDEN', [{'column': 'col_1', 'field_path': 'user/country', 'equals': 'GB'}],
+             ['user/address', 'user/zip_code', 'items/1/card'], None),
+            ('col_1', 'MASK-DATE', None, ['user/dob', 'user/email', 'user/created_at'], None),
+            ('col_1', 'HASH', [{'column': 'col_2', 'equals': 'x'}], ['user/email', 'missing/field'], None),
+            ('col_1', 'SET-NULL', [{'column': 'col_2', 'equals': 'y'}], ['user/email'], None),
+        ]
+        records = [
+            {'col_1': {'user': {'address': 'a', 'zip_code': 'z', 'country': 'GB', 'email': 'e', 'dob': '2020-05-17',
+                                'created_at': '2021-06-18'},
+                       'items': [{'card': 'c1'}, {'card': 'c2'}]},
+             'col_2': 'x'},
+            {'col_1': {'user': {'address': 'a', 'country': 'DE', 'email': 'e', 'dob': '2020-05-17'}, 'items': []},
+             'col_2': 'y'},
+            {'col_1': {'user': {'dob': 'not a date', 'email': 'e'}}, 'col_2': 'x'},
+            {'col_1': 'not a dict', 'col_2': 'x'},
+            {'col_1': None},
+            {'col_2': 'x'},
+        ]
+
+        apply_grouped = transform.compile_field_paths_transformations(rules)
+        transformations = [transform.compile_transformation(*rule[:4]) for rule in rules]
+
+        for record in records:
+            expected = copy.deepcopy(record)
+            expected_changed = False
+            for apply_transformation in transformations:
+                expected_changed = apply_transformation(expected) or expected_changed
+
+            self.assertEqual(apply_grouped(record), expected_changed)
+            self.assertDictEqual(record, expected)
+
+    def test_compile_trans_plan_groups_field_paths(self):
+        """Test transformations of nested fields of the same column are compiled into a single callable"""
+        trans_meta = {'stream_1': [
+            ('col_1', 'HASH', None, ['a/b']),
+            ('col_1', 'SET-NULL', None, ['a/c']),
+            ('col_2', 'SET-NULL', None, None),
+        ]}
+
+        self.assertEqual(len(transform.compile_trans_plan(trans_meta)['stream_1']), 2)
+        self.assertEqual(len(transform.compile_trans_plan(trans_meta, RuleProfiler())['stream_1']), 3)
+
+    def test_compile_field_path_updater_with_wildcards(self):
+        """Test wildcard field paths transform every matching field"""
+        obj = {'items': [{'card': 'a'}, {'card': 'b', 'other': 'c'}, {}], 'meta': {'x': {'card': 'd'}, 'y': 'e'}}
+
+        self.assertTrue(transform.compile_field_path_updater('items/*/card')(obj, str.upper))
+        self.assertTrue(transform.compile_field_path_updater('meta/*/card')(obj, str.upper))
+        self.assertDictEqual(
+            {'items': [{'card': 'A'}, {'card': 'B', 'other': 'c'}, {}], 'meta': {'x': {'card': 'D'}, 'y': 'e'}}, obj)
+
+        # Array wildcards match only array items, wildcards matching nothing aren't errors
+        self.assertFalse(transform.compile_field_path_updater('meta/[]/card')(obj, str.upper))
+        self.assertTrue(transform.compile_field_path_updater('items/[]/other')(obj, str.upper))
+        self.assertFalse(transform.compile_field_path_updater('missing/*')(obj, str.upper))
+        self.assertEqual(obj['items'][1]['other'], 'C')
+
+        # Matching fields are transformed all or none
+        with self.assertRaises(TypeError):
+            transform.compile_field_path_updater('*/*')({'a': {'b': 'x', 'c': 1}}, str.upper)
+
+    def test_compile_field_paths_transformations_with_wildcards(self):
+        """Test grouped transformations with wildcard field paths"""
+        rules = [
+            ('col_1', 'MASK-HIDDEN', None, ['items/*/card_number', 'user/address'], None),
+            ('col_1', 'HASH-SKIP-FIRST-1', None, ['items/[]/card_number', 'user/name'], None),
+        ]
+        record = {'col_1': {'items': [{'card_number': '1234'}, {'card_number': '5678'}, {'amount': 5}],
+                            'user': {'address': 'a', 'name': 'b'}}}
+
+        self.assertEqual(len(transform.group_field_paths_transformations(rules)), 1)
+        self.assertTrue(transform.compile_field_paths_transformations(rules)(record))
+
+        hashed = 'h' + hashlib.sha256('idden'.encode('utf-8')).hexdigest()
+        self.assertDictEqual(
+            {'col_1': {'items': [{'card_number': hashed}, {'card_number': hashed}, {'amount': 5}],
+                       'user': {'address': 'hidden', 'name': 'b' + hashlib.sha256(b'').hexdigest()}}},
+            record)
+
+        # Field paths matching parents of other field paths are not grouped
+        self.assertEqual(len(transform.group_field_paths_transformations(
+            [rules[0], ('col_1', 'SET-NULL', None, ['items/0'], None)])), 2)
+
+    def test_transform_field_paths_of_array_column(self):
+        """Test field paths within an array column transform only the matching fields"""
+        def record():
+            return {'col_1': [{'card_number': '1234', 'id': 1}, {'card_number': '5678', 'id': 2}]}
+
+        masked = {'col_1': [{'card_number': 'hidden', 'id': 1}, {'card_number': 'hidden', 'id': 2}]}
+
+        for field_path in ('[]/card_number', '*/card_number'):
+            one_by_one = record()
+            self.assertTrue(transform.compile_transformation('col_1', 'MASK-HIDDEN', None, [field_path])(one_by_one))
+            self.assertDictEqual(masked, one_by_one)
+
+            grouped = record()
+            rules = [('col_1', 'MASK-HIDDEN', None, [field_path], None), ('col_1', 'SET-NULL', None, ['0/id'], None)]
+            self.assertTrue(transform.compile_field_paths_transformations(rules)(grouped))
+            self.assertDictEqual(
+                {'col_1': [{'card_number': 'hidden', 'id': None}, {'card_number': 'hidden', 'id': 2}]}, grouped)
+
+            self.assertListEqual(masked['col_1'],
+                                 transform.do_transform(record(), 'col_1', 'MASK-HIDDEN', field_paths=[field_path]))
+
+        # Array indices are field paths too
+        indexed = record()
+        self.assertTrue(transform.compile_transformation('col_1', 'MASK-HIDDEN', None, ['1/card_number'])(indexed))
+        self.assertListEqual(['1234', 'hidden'], [item['card_number'] for item in indexed['col_1']])
@@ -1,10 +1,11 @@
 import argparse
+import io
 import unittest
 
 from unittest.mock import patch
 from singer import Catalog
 
-from transform_field.utils import get_stream_schemas, parse_args
+from transform_field.utils import get_stream_schemas, parse_args, read_lines
 
 
 class TestUtils(unittest.TestCase):
@@ -102,3 +103,15 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(args.config, {})
         self.assertEqual(args.catalog, {})
         self.assertEqual(args.validate, False)
+
+    def test_read_lines(self):
+        data = b'{"a": 1}\n{"b": "\xc3\x9c"}\n\n{"c": 3}'
+
+        for buffer_size in (1, 2, 3, 7, 1024):
+            self.assertListEqual(
+                list(read_lines(io.BytesIO(data), buffer_size)),
+                [b'{"a": 1}\n', b'{"b": "\xc3\x9c"}\n', b'\n', b'{"c": 3}']
+            )
+
+    def test_read_lines_from_empty_stream(self):
+        self.assertListEqual(list(read_lines(io.BytesIO(b''))), [])
@@ -0,0 +1,165 @@
+import unittest
+
+from decimal import Decimal
+from jsonschema import Draft7Validator, FormatChecker, ValidationError
+
+from unittest.mock import patch
+
+from transform_field.validation import compile_schema, parse_validation_mode, RecordSampler, SchemaValidator, \
+    StreamValidator, UnsupportedSchemaException
+
+
+class TestValidation(unittest.TestCase):
+    """
+    Unit Tests for the validation module
+    """
+
+    def setUp(self) -> None:
+        self.schema = {
+            'type': 'object',
+            'properties': {
+                'id': {'type': ['integer'], 'minimum': -10, 'maximum': Decimal('1000.5')},
+                'name': {'type': ['null', 'string'], 'maxLength': 5, 'minLength': 1},
+                'code': {'type': 'string', 'pattern': '^[A-Z]+$'},
+                'amount': {'type': ['null', 'number'], 'exclusiveMinimum': 0, 'exclusiveMaximum': 100},
+                'active': {'type': 'boolean', 'inclusion': 'available'},
+                'created_at': {'type': 'string', 'format': 'date'},
+                'tags': {'type': 'array', 'items': {'type': 'string'}, 'maxItems': 2, 'minItems': 1},
+                'payload': {'type': 'object', 'properties': {'key': {'type': 'integer'}}, 'required': ['key'],
+                            'additionalProperties': False},
+                'any': {},
+                'either': {'anyOf': [{'type': 'integer'}, {'type': 'string', 'maxLength': 2}]},
+                'one': {'oneOf': [{'type': 'integer'}, {'type': 'number'}]},
+                'all': {'allOf': [{'type': 'string'}, {'minLength': 2}]},
+                'not_null': {'not': {'type': 'null'}},
+            },
+            'required': ['id'],
+        }
+
+        self.instances = [
+            {'id': 1},
+            {'id': 1.0},
+            {'id': Decimal('1.5')},
+            {'id': True},
+            {'id': -11},
+            {'id': 1001},
+            {'name': 'John'},
+            {'id': 1, 'name': None},
+            {'id': 1, 'name': 'Johnny'},
+            {'id': 1, 'name': ''},
+            {'id': 1, 'name': 5},
+            {'id': 1, 'code': 'ABC'},
+            {'id': 1, 'code': 'abc'},
+            {'id': 1, 'amount': Decimal('0')},
+            {'id': 1, 'amount': Decimal('0.1')},
+            {'id': 1, 'amount': 100},
+            {'id': 1, 'amount': True},
+            {'id': 1, 'active': False},
+            {'id': 1, 'active': 0},
+            {'id': 1, 'created_at': '2021-12-01'},
+            {'id': 1, 'created_at': '2021-13-01'},
+            {'id': 1, 'tags': ['a']},
+            {'id': 1, 'tags': []},
+            {'id': 1, 'tags': ['a', 'b', 'c']},
+            {'id': 1, 'tags': ['a', 1]},
+            {'id': 1, 'payload': {'key': 1}},
+            {'id': 1, 'payload': {}},
+            {'id': 1, 'payload': {'key': 1, 'other': 2}},
+            {'id': 1, 'payload': 'not an object'},
+            {'id': 1, 'any': [1, {'a': None}]},
+            {'id': 1, 'either': 1},
+            {'id': 1, 'either': 'ab'},
+            {'id': 1, 'either': 'abc'},
+            {'id': 1, 'one': 1},
+            {'id': 1, 'one': Decimal('1.5')},
+            {'id': 1, 'all': 'ab'},
+            {'id': 1, 'all': 'a'},
+            {'id': 1, 'not_null': None},
+            {'id': 1, 'not_null': 'a'},
+            {'id': 1, 'extra': 'allowed'},
+            [],
+        ]
+
+    def test_compiled_same_as_draft7(self):
+        validator = Draft7Validator(self.schema, format_checker=FormatChecker())
+        is_valid = compile_schema(self.schema, validator.format_checker)
+
+        for instance in self.instances:
+            self.assertEqual(is_valid(instance), validator.is_valid(instance), instance)
+
+    def test_compile_unsupported_keywords_fails(self):
+        for schema in ({'enum': [1, 2]},
+                       {'properties': {'amount': {'type': 'number', 'multipleOf': Decimal('0.01')}}},
+                       {'items': [{'type': 'string'}]},
+                       {'type': 'decimal'}):
+            with self.assertRaises(UnsupportedSchemaException):
+                compile_schema(schema, FormatChecker())
+
+    def test_schema_validator(self):
+        validator = SchemaValidator(self.schema)
+
+        self.assertTrue(validator.compiled)
+        validator.validate({'id': 1, 'name': 'John'})
+
+        with self.assertRaises(ValidationError) as error:
+            validator.validate({'id': 1, 'name': 'Johnny'})
+
+        with self.assertRaises(ValidationError) as draft7_error:
+            Draft7Validator(self.schema, format_checker=FormatChecker()).validate({'id': 1, 'name': 'Johnny'})
+
+        self.assertEqual(str(error.exception), str(draft7_error.exception))
+
+    def test_schema_validator_with_unsupported_schema(self):
+        validator = SchemaValidator({'properties': {'status': {'enum': ['open', 'closed']}}})
+
+        self.assertFalse(validator.compiled)
+        validator.validate({'status': 'open'})
+
+        with self.assertRaises(ValidationError):
+            validator.validate({'status': 'pending'})
+
+    def test_stream_validator(self):
+        validator = StreamValidator(self.schema, ['id', 'name'], ['name', 'code', 'name'])
+
+        self.assertListEqual(validator.trans_fields, ['name', 'code'])
+
+        # Only the transformed properties are validated
+        validator.validate_transformed({'id': 'not an integer', 'name': 'John'})
+
+        with self.assertRaises(ValidationError):
+            validator.validate_transformed({'id': 1, 'code': 'abc'})
+
+        with self.assertRaises(ValidationError):
+            validator.validate({'id': 'not an integer', 'name': 'John'})
+
+        self.assertIsNone(validator.get_missing_key_property({'id': 1, 'name': 'John'}))
+        self.assertEqual(validator.get_missing_key_property({'code': 'ABC'}), 'id')
+
+    def test_parse_validation_mode(self):
+        self.assertEqual(parse_validation_mode('off'), ('off', None))
+        self.assertEqual(parse_validation_mode('full'), ('full', None))
+        self.assertEqual(parse_validation_mode('sample:10'), ('sample', 10))
+        self.assertEqual(parse_validation_mode('sample:0.25'), ('sample', 0.25))
+        self.assertEqual(parse_validation_mode('first:0'), ('first', 0))
+
+        for mode in ['', 'full:1', 'sample', 'sample:0', 'sample:1.5', 'sample:x', 'first:-1', 'first:0.5', 'all']:
+            with self.assertRaises(ValueError):
+                parse_validation_mode(mode)
+
+    def test_record_sampler(self):
+        def sample(sampler, num_records):
+            return [sampler.is_sampled() for _ in range(num_records)]
+
+        self.assertFalse(RecordSampler('off').enabled)
+        self.assertListEqual(sample(RecordSampler('off'), 3), [False] * 3)
+        self.assertListEqual(sample(RecordSampler('full'), 3), [True] * 3)
+        self.assertListEqual(sample(RecordSampler('sample:3'), 7), [True, False, False, True, False, False, True])
+
+        sampler = RecordSampler('first:2')
+        self.assertListEqual(sample(sampler, 3), [True, True, False])
+        sampler.reset()
+        self.assertListEqual(sample(sampler, 3), [True, True, False])
+        self.assertEqual((sampler.validated, sampler.skipped), (4, 2))
+
+        with patch('random.random', side_effect=[0.1, 0.6, 0.4]):
+            self.assertListEqual(sample(RecordSampler('sample:0.5'), 3), [True, False, True])
@@ -0,0 +1,53 @@
+import hashlib
+import unittest
+
+import singer
+
+from transform_field import workers, TransMeta
+
+
+class TestWorkers(unittest.TestCase):
+    """
+    Unit Tests for the workers module
+    """
+
+    def setUp(self) -> None:
+        self.trans_meta = {
+            'stream_1': [
+                TransMeta('column_2', 'SET-NULL', [{'column': 'column_1', 'equals': 'secret'}], None),
+                TransMeta('column_1', 'HASH', None, None),
+            ]
+        }
+
+    def test_transform_chunk(self):
+        workers._init_worker(self.trans_meta)
+
+        self.assertListEqual(
+            workers._transform_chunk(('stream_1', [{'id': 1}, {'column_1': 'secret', 'column_2': 'x'}])),
+            [(1, {'column_1': hashlib.sha256('secret'.encode('utf-8')).hexdigest(), 'column_2': None})]
+        )
+        self.assertListEqual(workers._transform_chunk(('stream_2', [{'column_1': 'secret'}])), [])
+
+    def test_is_worth(self):
+        pool = workers.TransformPool(self.trans_meta, 2)
+
+        self.assertFalse(pool.is_worth(2 * workers.MIN_CHUNK_RECORDS - 1))
+        self.assertTrue(pool.is_worth(2 * workers.MIN_CHUNK_RECORDS))
+
+    def test_transform_keeps_order(self):
+        messages = [singer.ActivateVersionMessage('stream_1', 1)] + [
+            singer.RecordMessage('stream_1', {'id': i, 'column_1': 'secret' if i % 3 else 'public', 'column_2': 'x'})
+            for i in range(100)
+        ]
+
+        pool = workers.TransformPool(self.trans_meta, 2)
+        try:
+            changes = pool.transform('stream_1', messages)
+        finally:
+            pool.close()
+
+        self.assertFalse(changes[0])
+        self.assertListEqual(changes[1:], [True] * 100)
+        self.assertListEqual([message.record['id'] for message in messages[1:]], list(range(100)))
+        self.assertListEqual([message.record['column_2'] for message in messages[1:]],
+                             [None if i % 3 else 'x' for i in range(100)])
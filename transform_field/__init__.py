@@ -1,17 +1,25 @@
-import io
 import sys
 import time
+import threading
 import singer
 
-from typing import Union, Dict
+from typing import Union, Dict, List
 from enum import Enum, unique
 from collections import namedtuple
 from decimal import Decimal
-from jsonschema import FormatChecker, Draft7Validator
 from singer import Catalog, Schema
 
+from transform_field import batching
+from transform_field import codec
+from transform_field import pipeline
 from transform_field import transform
 from transform_field import utils
+from transform_field.metrics import LatencyTracker, Metrics, DEFAULT_METRICS_INTERVAL_SECONDS
+from transform_field.profiling import RuleProfiler
+from transform_field.output import OutputWriter, DEFAULT_MAX_BUFFER_BYTES
+from transform_field.state import StateEmitter
+from transform_field.validation import RecordSampler, StreamValidator, VALIDATION_MODE_FULL, VALIDATION_MODE_OFF
+from transform_field.workers import TransformPool
 from transform_field.timings import Timings
 
 from transform_field.errors import CatalogRequiredException, StreamNotFoundException, InvalidTransformationException, \
@@ -23,10 +31,22 @@ TIMINGS = Timings(LOGGER)
 DEFAULT_MAX_BATCH_BYTES = 4000000
 DEFAULT_MAX_BATCH_RECORDS = 20000
 DEFAULT_BATCH_DELAY_SECONDS = 300.0
+
+# Interval of checking for buffers to flush when no new message arrives
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_STREAMING_FLUSH_INTERVAL_SECONDS = 0.01
+# Validation mode of the streams without a configured validation mode
 VALIDATE_RECORDS = False
 
-StreamMeta = namedtuple('StreamMeta', ['schema', 'key_properties', 'bookmark_properties'])
-TransMeta = namedtuple('TransMeta', ['field_id', 'type', 'when', 'field_paths'])
+# Validation of the whole records or of the transformed properties only
+VALIDATION_SCOPE_RECORD = 'record'
+VALIDATION_SCOPE_TRANSFORMED = 'transformed'
+VALIDATION_SCOPES = (VALIDATION_SCOPE_RECORD, VALIDATION_SCOPE_TRANSFORMED)
+
+StreamMeta = namedtuple('StreamMeta', ['schema', 'key_properties', 'bookmark_properties', 'validator', 'sampler'])
+TransMeta = namedtuple('TransMeta', ['field_id', 'type', 'when', 'field_paths', 'cache'])
+# No cache by default, namedtuple has no defaults argument before Python 3.7
+TransMeta.__new__.__defaults__ = (None,)
 
 REQUIRED_CONFIG_KEYS = [
     "transformations"
@@ -68,15 +88,71 @@ class TransformField:
     Main Transformer class
     """
 
+    # pylint: disable=too-many-instance-attributes
     def __init__(self, trans_config):
         self.trans_config = trans_config
         self.messages = []
+        # Raw lines of the buffered messages, to be written as they are when no transformation is needed
+        self.lines = []
+        # Mapping from stream name to the positions of its messages in the buffer, so the records
+        # of every stream are transformed and validated as one batch even if streams are interleaved
+        self.stream_positions = {}
         self.buffer_size_bytes = 0
-        self.state = None
+        # States received while records are buffered, with the number of messages buffered before them
+        self.buffered_states = []
+
+        self.__init_validation(trans_config)
+
+        # Decoder of the incoming lines
+        self.json_decoder = codec.get_json_decoder(trans_config.get('json_decoder'))
+
+        # Buffered writer of the outgoing messages
+        # Lines are read and written as bytes without decoding them in binary mode
+        max_output_buffer_bytes = trans_config.get('max_output_buffer_bytes') or DEFAULT_MAX_BUFFER_BYTES
+        binary_io = trans_config.get('binary_io', False)
+
+        # In pipelined mode input is read and output is written in background threads
+        self.pipelined = trans_config.get('pipelined', False)
+        self.max_queue_size = trans_config.get('max_queue_size') or pipeline.DEFAULT_MAX_QUEUE_SIZE
+
+        # In streaming mode records are transformed and written immediately instead of in batches,
+        # written lines are flushed by the timer to coalesce writes
+        self.streaming = trans_config.get('streaming', False)
+        self.flush_interval_seconds = trans_config.get('flush_interval_seconds') or (
+            DEFAULT_STREAMING_FLUSH_INTERVAL_SECONDS if self.streaming else DEFAULT_FLUSH_INTERVAL_SECONDS)
+
+        # Held while handling a line or flushing, as buffers are flushed by the timer thread as well
+        self.lock = threading.Lock()
+
+        if self.pipelined:
+            self.writer = pipeline.ThreadedOutputWriter(max_output_buffer_bytes, binary_io, self.max_queue_size)
+        else:
+            self.writer = OutputWriter(max_output_buffer_bytes, binary_io)
+
+        # Writer of the states according to the state emission policy
+        try:
+            self.state_emitter = StateEmitter(self.writer, trans_config.get('state_emission'))
+        except ValueError as exc:
+            raise TransformFieldException(str(exc)) from exc
+
+        # Limits of a batch, the first limit reached flushes the batch
+        self.max_batch_bytes = trans_config.get('max_batch_bytes') or DEFAULT_MAX_BATCH_BYTES
+        self.max_batch_records = trans_config.get('max_batch_records') or DEFAULT_MAX_BATCH_RECORDS
+        self.batch_delay_seconds = trans_config.get('batch_delay_seconds') or DEFAULT_BATCH_DELAY_SECONDS
+
+        # With a maximum latency, the number of records of a batch is tuned at runtime
+        max_batch_latency_seconds = trans_config.get('max_batch_latency_seconds')
+        if max_batch_latency_seconds:
+            self.batch_size = batching.AdaptiveBatchSize(self.max_batch_records, max_batch_latency_seconds)
+            self.batch_delay_seconds = min(self.batch_delay_seconds, max_batch_latency_seconds)
+        else:
+            self.batch_size = None
 
         # Time that the last batch was sent
         self.time_last_batch_sent = time.time()
 
+        self.__init_metrics(trans_config)
+
         # Mapping from stream name to {'schema': ..., 'key_names': ..., 'bookmark_names': ... }
         self.stream_meta = {}
 
@@ -95,132 +171,458 @@ class TransformField:
                 trans["field_id"],
                 trans["type"],
                 trans.get('when'),
-                trans.get('field_paths')
+                trans.get('field_paths'),
+                trans.get('cache')
             ))
 
-    # pylint: disable=too-many-nested-blocks,too-many-branches
-    # todo: simplify this method
+        # Optional profiling of every transformation, written as a JSON report at the end
+        self.rule_profile_file = trans_config.get('rule_profile_file')
+        self.profiler = RuleProfiler() if self.rule_profile_file else None
+
+        # Mapping from stream name to its list of compiled transformations, each of them
+        # applying a transformation to a record in place
+        # Memo caches of the hashing transformations, their counters are logged with the timings
+        self.caches = {}
+        self.trans_plan = transform.compile_trans_plan(self.trans_meta, self.profiler, self.caches)
+
+        # Pool of worker processes applying the transformations, if more than one worker is configured
+        workers = trans_config.get('workers') or 1
+        if workers > 1 and self.profiler is not None:
+            # Transformations applied in the worker processes cannot be profiled
+            LOGGER.warning('Worker processes are not used when profiling transformations')
+            workers = 1
+
+        self.pool = TransformPool(self.trans_meta, workers) if workers > 1 else None
+
+    def __init_metrics(self, trans_config):
+        """Set the metrics and the optional latency histograms from the config"""
+        # Optional histograms of the latency of the records and of the duration of the batches,
+        # logged with the metrics and written to the latency metrics file at the end
+        self.latency_metrics_file = trans_config.get('latency_metrics_file')
+        self.latency = LatencyTracker() if trans_config.get('track_latency') or self.latency_metrics_file else None
+
+        # Counters of records and bytes of every stream, logged as metrics with the timings
+        self.metrics = Metrics(LOGGER, TIMINGS,
+                               trans_config.get('metrics_interval_seconds') or DEFAULT_METRICS_INTERVAL_SECONDS,
+                               self.latency)
+
+    def __init_validation(self, trans_config):
+        """Set the validation mode and scope of the streams from the config"""
+        # Validation mode of every stream and of specific streams
+        self.validation_mode = trans_config.get('validation_mode') or (
+            VALIDATION_MODE_FULL if VALIDATE_RECORDS else VALIDATION_MODE_OFF)
+        self.stream_validation_modes = trans_config.get('stream_validation_modes') or {}
+
+        for mode in [self.validation_mode, *self.stream_validation_modes.values()]:
+            try:
+                RecordSampler(mode)
+            except ValueError as exc:
+                raise TransformFieldException(str(exc)) from exc
+
+        # Validation of whole records or of the transformed properties only
+        self.validation_scope = trans_config.get('validation_scope') or VALIDATION_SCOPE_RECORD
+        if self.validation_scope not in VALIDATION_SCOPES:
+            raise TransformFieldException(f'Unknown validation scope `{self.validation_scope}`, '
+                                          f'supported scopes are {", ".join(VALIDATION_SCOPES)}')
+
+    @property
+    def state(self):
+        """Last state whose preceding records have all been written, None if there is no state to write"""
+        return self.state_emitter.state
+
     def flush(self):
         """Give batch to handlers to process"""
 
-        if self.messages:
-            stream = self.messages[0].stream
-            stream_meta = self.stream_meta[stream]
+        num_messages = len(self.messages)
+        streams = list(self.stream_positions)
+        time_flush_started = time.time()
+        time_transformed = time_flush_started
+        fill_seconds = time_flush_started - self.time_last_batch_sent
 
-            # Transform columns
+        if self.messages:
             messages = self.messages
-            schema = float_to_decimal(stream_meta.schema)
-            key_properties = stream_meta.key_properties
-            validator = Draft7Validator(schema, format_checker=FormatChecker())
-            trans_meta = []
-            if stream in self.trans_meta:
-                trans_meta = self.trans_meta[stream]
-
-            for i, message in enumerate(messages):
-                if isinstance(message, singer.RecordMessage):
+            changes = [False] * len(messages)
 
-                    # Do transformation on every column where it is required
-                    for trans in trans_meta:
+            # Transform and validate the records of every stream as one batch
+            for stream, positions in self.stream_positions.items():
+                self.process_stream_batch(stream, positions, changes)
 
-                        if trans.field_id in message.record:
-                            transformed = transform.do_transform(
-                                message.record, trans.field_id, trans.type, trans.when, trans.field_paths
-                            )
-                            message.record[trans.field_id] = transformed
+            time_transformed = time.time()
 
-                    if VALIDATE_RECORDS:
-                        # Validate the transformed columns
-                        data = float_to_decimal(message.record)
-                        try:
-                            validator.validate(data)
-                            if key_properties:
-                                for k in key_properties:
-                                    if k not in data:
-                                        raise TransformFieldException(
-                                            f'Message {i} is missing key property {k}')
-
-                        except Exception as exc:
-                            if type(exc).__name__ == "InvalidOperation":
-                                raise TransformFieldException(
-                                    f"Record does not pass schema validation. RECORD: {message.record}"
-                                    "\n'multipleOf' validations that allows long precisions are not "
-                                    "supported (i.e. with 15 digits or more). "
-                                    f"Try removing 'multipleOf' methods from JSON schema.\n{exc}") from exc
-
-                            raise TransformFieldException(
-                                f"Record does not pass schema validation. RECORD: {message.record}\n{exc}") from exc
-
-                    # Write the transformed message
-                    singer.write_message(message)
-
-            LOGGER.debug("Batch is valid with %s messages", len(messages))
+            with TIMINGS.mode('writing'):
+                self.write_batch(changes)
+
+            LOGGER.debug("Batch is valid with %s messages of %s streams", len(messages), len(self.stream_positions))
 
             # Update stats
             self.time_last_batch_sent = time.time()
             self.messages = []
+            self.lines = []
+            self.stream_positions = {}
             self.buffer_size_bytes = 0
+            self.buffered_states = []
+
+        with TIMINGS.mode('writing'):
+            self.state_emitter.flushed()
+            self.writer.flush()
+
+        if self.latency is not None:
+            self.latency.written()
+            if num_messages:
+                self.latency.flushed(streams, time.time() - time_flush_started)
+
+        if self.batch_size is not None and num_messages:
+            self.batch_size.update(num_messages, fill_seconds,
+                                   time_transformed - time_flush_started, time.time() - time_transformed)
+
+        TIMINGS.log_timings(self.caches)
+
+    def write_batch(self, changes: List[bool]):
+        """
+        Write the buffered messages, with the states received in between them
+        :param changes: List telling for every buffered message if it has been changed by the transformations
+        """
+        states = self.buffered_states
+        next_state = 0
+
+        # Write the messages of every stream in the same order as received
+        for i, (message, line, changed) in enumerate(zip(self.messages, self.lines, changes)):
+            # States received before this message can be written from now on
+            while next_state < len(states) and states[next_state][0] <= i:
+                self.state_emitter.add(states[next_state][1])
+                next_state += 1
+
+            if isinstance(message, singer.RecordMessage):
+
+                # Write the transformed message, records not changed by any transformation
+                # are copied from the input line as they are
+                if changed:
+                    self.writer.write_message(message)
+                else:
+                    self.writer.write_line(line)
+
+                self.state_emitter.record_written()
+
+            # Same schema sent again during the batch
+            elif isinstance(message, singer.SchemaMessage):
+                self.write_schema(message, line)
+
+        # States received after every buffered message
+        for _, state in states[next_state:]:
+            self.state_emitter.add(state)
+
+    def process_stream_batch(self, stream: str, positions: List[int], changes: List[bool]):
+        """
+        Transform and validate the buffered messages of a stream
+        :param stream: name of the stream
+        :param positions: positions of the messages of the stream in the buffer
+        :param changes: List telling for every buffered message if it has been changed by the transformations,
+                        updated for the messages of the stream
+        """
+        stream_meta = self.stream_meta[stream]
+        messages = [self.messages[position] for position in positions]
+
+        # Do transformation on every column where it is required
+        with TIMINGS.mode('transforming'):
+            stream_changes = self.transform_batch(stream, messages)
+
+        validator = stream_meta.validator
+        sampler = stream_meta.sampler
+
+        with TIMINGS.mode('validating'):
+            for i, (message, position, changed) in enumerate(zip(messages, positions, stream_changes)):
+                changes[position] = changed
+
+                if isinstance(message, singer.RecordMessage):
+                    if validator is not None and sampler.is_sampled():
+                        # Validate the transformed columns
+                        self.validate_record(message, i, validator, changed)
+
+                # Same schema sent again during the batch
+                elif isinstance(message, singer.SchemaMessage):
+                    sampler.reset()
+
+        if validator is not None:
+            LOGGER.debug('Validation of stream %s in %s mode: %d records validated, %d records skipped',
+                         stream, self.get_validation_mode(stream), sampler.validated, sampler.skipped)
+
+    def transform_batch(self, stream: str, messages: List[singer.Message]) -> List[bool]:
+        """
+        Transform the records of a batch in place, in the worker processes if the batch is large enough
+        :param stream: name of the stream of the batch
+        :param messages: messages of the batch
+        :return: List telling for every message if it has been changed by the transformations
+        """
+        trans_plan = self.trans_plan.get(stream)
+        if not trans_plan:
+            return [False] * len(messages)
+
+        if self.pool is not None and self.pool.is_worth(len(messages)):
+            return self.pool.transform(stream, messages)
+
+        changes = []
+        for message in messages:
+            changed = False
+            if isinstance(message, singer.RecordMessage):
+                for apply_transformation in trans_plan:
+                    changed = apply_transformation(message.record) or changed
+
+            changes.append(changed)
+
+        return changes
+
+    def get_validation_mode(self, stream: str) -> str:
+        """Get the validation mode of a stream"""
+        return self.stream_validation_modes.get(stream, self.validation_mode)
+
+    def validate_record(self, message: singer.RecordMessage, index: int, validator: StreamValidator, changed: bool):
+        """
+        Validate a transformed record against the stream schema
+        :param message: the record message to validate
+        :param index: position of the message in the batch
+        :param validator: validator of the stream
+        :param changed: True if the record has been changed by any transformation
+        """
+        record = message.record
+        try:
+            if self.validation_scope == VALIDATION_SCOPE_TRANSFORMED:
+                # Validation is to catch transformations breaking the schema, only the transformed
+                # properties of changed records need to be validated
+                if changed:
+                    validator.validate_transformed(record)
+
+            else:
+                # No need to walk the record, every number has already been decoded into Decimal
+                validator.validate(record)
+
+            missing_key_property = validator.get_missing_key_property(record)
+            if missing_key_property is not None:
+                raise TransformFieldException(
+                    f'Message {index} is missing key property {missing_key_property}')
+
+        except Exception as exc:
+            if type(exc).__name__ == "InvalidOperation":
+                raise TransformFieldException(
+                    f"Record does not pass schema validation. RECORD: {message.record}"
+                    "\n'multipleOf' validations that allows long precisions are not "
+                    "supported (i.e. with 15 digits or more). "
+                    f"Try removing 'multipleOf' methods from JSON schema.\n{exc}") from exc
+
+            raise TransformFieldException(
+                f"Record does not pass schema validation. RECORD: {message.record}\n{exc}") from exc
+
+    def write_schema(self, message: singer.SchemaMessage, line: Union[str, bytes]):
+        """Write the schema message, as it is if no transformation is needed for the stream"""
+        if message.stream in self.trans_plan:
+            self.writer.write_message(message)
+        else:
+            self.writer.write_line(line)
+
+    def handle_schema(self, message: singer.SchemaMessage, line: Union[str, bytes]):
+        """
+        Set the schema and key properties of the stream. Flush the batch, if there is one,
+        in case the schema is different
+        """
+        stream_meta = self.stream_meta.get(message.stream)
+
+        # Taps often send the same schema again, no need to flush the batch and to
+        # validate the transformations again in this case
+        if stream_meta and (stream_meta.schema, stream_meta.key_properties, stream_meta.bookmark_properties) == \
+                (message.schema, message.key_properties, message.bookmark_properties):
+
+            # Keep the message in the batch to write it in the same order as received
+            if self.messages:
+                self.buffer_message(message, line)
+            else:
+                stream_meta.sampler.reset()
+                self.write_schema(message, line)
 
-        if self.state:
-            singer.write_message(singer.StateMessage(self.state))
-            self.state = None
+            return
+
+        self.flush()
 
-        TIMINGS.log_timings()
+        sampler = RecordSampler(self.get_validation_mode(message.stream))
 
-    def handle_line(self, line):
-        """Takes a raw line from stdin and transforms it"""
+        self.stream_meta[message.stream] = StreamMeta(
+            message.schema,
+            message.key_properties,
+            message.bookmark_properties,
+            StreamValidator(float_to_decimal(message.schema),
+                            message.key_properties,
+                            [trans.field_id for trans in self.trans_meta.get(message.stream, [])])
+            if sampler.enabled else None,
+            sampler)
+
+        # if schema message, do validation of transformations using the schema to detect any
+        # incompatibilities between the transformation and column types
+        self.__validate_stream_trans(message.stream, message.schema)
+
+        self.write_schema(message, line)
+
+    def add_state(self, state):
+        """Add a state to write after every record received before it"""
+        if self.messages:
+            # To be written once every buffered record has been written
+            self.buffered_states.append((len(self.messages), state))
+        else:
+            self.state_emitter.add(state)
+
+            # Every message is a batch of its own in streaming mode
+            if self.streaming:
+                self.state_emitter.flushed()
+
+    def handle_line(self, line: Union[str, bytes]):
+        """Takes a raw line from stdin and transforms it, lines are bytes in binary mode and str otherwise"""
+        start = time.perf_counter()
         try:
-            message = singer.parse_message(line)
+            message = codec.parse_message(line, self.json_decoder)
 
             if not message:
                 raise TransformFieldException('Unknown message type')
         except Exception as exc:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
             raise TransformFieldException(f'Failed to process incoming message: {line}\n{exc}') from exc
 
-        # If we got a Schema, set the schema and key properties for this
-        # stream. Flush the batch, if there is one, in case the schema is
-        # different
-        if isinstance(message, singer.SchemaMessage):
-            self.flush()
+        TIMINGS.add('parsing', time.perf_counter() - start)
 
-            self.stream_meta[message.stream] = StreamMeta(
-                message.schema,
-                message.key_properties,
-                message.bookmark_properties)
+        if isinstance(message, singer.RecordMessage):
+            self.metrics.count(message.stream, len(line))
 
-            # if schema message, do validation of transformations using the schema to detect any
-            # incompatibilities between the transformation and column types
-            self.__validate_stream_trans(message.stream, message.schema)
+            if self.latency is not None:
+                self.latency.read(message.stream)
 
-            # Write the transformed message
-            singer.write_message(message)
+        if isinstance(message, singer.SchemaMessage):
+            self.handle_schema(message, line)
+
+        elif self.streaming and isinstance(message, (singer.RecordMessage, singer.ActivateVersionMessage)):
+            # Activate version messages are not written, the same way as in batches
+            if isinstance(message, singer.RecordMessage):
+                self.write_record(message, line)
 
         elif isinstance(message, (singer.RecordMessage, singer.ActivateVersionMessage)):
-            if self.messages and (
-                    message.stream != self.messages[0].stream or
-                    message.version != self.messages[0].version):
-                self.flush()
-            self.messages.append(message)
+            # Messages of interleaved streams and versions are buffered together, hence
+            # they are written in the same order as received
+            self.buffer_message(message, line)
+            # Real bytes in binary mode, characters otherwise
             self.buffer_size_bytes += len(line)
 
             num_bytes = self.buffer_size_bytes
             num_messages = len(self.messages)
             num_seconds = time.time() - self.time_last_batch_sent
 
-            enough_bytes = num_bytes >= DEFAULT_MAX_BATCH_BYTES
-            enough_messages = num_messages >= DEFAULT_MAX_BATCH_RECORDS
-            enough_time = num_seconds >= DEFAULT_BATCH_DELAY_SECONDS
+            enough_bytes = num_bytes >= self.max_batch_bytes
+            enough_messages = num_messages >= (
+                self.batch_size.records if self.batch_size is not None else self.max_batch_records)
+            enough_time = num_seconds >= self.batch_delay_seconds
             if enough_bytes or enough_messages or enough_time:
                 LOGGER.debug('Flushing %d bytes, %d messages, after %.2f seconds', num_bytes, num_messages, num_seconds)
                 self.flush()
 
         elif isinstance(message, singer.StateMessage):
-            self.state = message.value
+            self.add_state(message.value)
+
+    def write_record(self, message: singer.RecordMessage, line: Union[str, bytes]):
+        """Transform, validate and write a record immediately, in streaming mode"""
+        time_started = time.perf_counter()
+
+        changed = False
+        for apply_transformation in self.trans_plan.get(message.stream, ()):
+            changed = apply_transformation(message.record) or changed
+
+        time_transformed = time.perf_counter()
+
+        stream_meta = self.stream_meta[message.stream]
+        sampler = stream_meta.sampler
+        if stream_meta.validator is not None and sampler.is_sampled():
+            # Position of the record since the last schema message
+            self.validate_record(message, sampler.seen - 1, stream_meta.validator, changed)
+
+        time_validated = time.perf_counter()
+
+        if changed:
+            self.writer.write_message(message)
+        else:
+            self.writer.write_line(line)
+
+        self.state_emitter.record_written()
+
+        TIMINGS.add('transforming', time_transformed - time_started)
+        TIMINGS.add('validating', time_validated - time_transformed)
+        TIMINGS.add('writing', time.perf_counter() - time_validated)
+
+    def flush_idle(self):
+        """Flush the buffers if no message has been flushed for long enough, called by the timer thread"""
+        with self.lock:
+            if not self.streaming and (self.messages or self.state) and \
+                    time.time() - self.time_last_batch_sent >= self.batch_delay_seconds:
+                LOGGER.debug('Flushing idle buffers after %.2f seconds', time.time() - self.time_last_batch_sent)
+                self.flush()
+
+            else:
+                # Lines written in streaming mode, or the last state if it's due
+                self.state_emitter.idle()
+                self.writer.flush()
+
+                # Buffered records are still pending in batch mode
+                if self.latency is not None and self.streaming:
+                    self.latency.written()
+
+            self.metrics.log_if_due()
+
+    def buffer_message(self, message: singer.Message, line: Union[str, bytes]):
+        """Add a message and its raw line to the buffer of its stream"""
+        self.stream_positions.setdefault(message.stream, []).append(len(self.messages))
+        self.messages.append(message)
+        self.lines.append(line)
 
     def consume(self, reader):
         """Consume all the lines from the queue, flushing when done."""
-        for line in reader:
-            self.handle_line(line)
-        self.flush()
+        timer = pipeline.FlushTimer(self.flush_interval_seconds, self.flush_idle)
+
+        # Lines are always read in a background thread, so a failed flush of the timer stops
+        # consuming while waiting for input. Only pipelined mode reads ahead more than a chunk,
+        # and lines are passed one by one in streaming mode not to hold them back.
+        reader = pipeline.read_in_background(reader,
+                                             self.max_queue_size if self.pipelined else 1,
+                                             1 if self.streaming else pipeline.DEFAULT_READ_CHUNK_LINES,
+                                             timer.raise_error)
+
+        try:
+            for line in reader:
+                with self.lock:
+                    self.handle_line(line)
+
+                timer.raise_error()
+
+            timer.stop()
+            timer.raise_error()
+
+            self.flush()
+
+            # The last state is written at the end regardless of the state emission policy
+            self.state_emitter.finish()
+            self.writer.flush()
+
+            if self.latency is not None:
+                self.latency.written()
+
+            self.metrics.log()
+
+        finally:
+            timer.stop()
+            self.writer.join()
+
+            if self.profiler is not None:
+                self.profiler.dump(self.rule_profile_file)
+                LOGGER.info('Transformation profile written to %s', self.rule_profile_file)
+
+            if self.latency_metrics_file:
+                self.latency.dump(self.latency_metrics_file)
+                LOGGER.info('Latency metrics written to %s', self.latency_metrics_file)
+
+            if self.pool is not None:
+                self.pool.close()
 
     def validate(self, catalog: Catalog):
         """
@@ -238,6 +640,7 @@ class TransformField:
         for stream_id in self.trans_meta:
             self.__validate_stream_trans(stream_id, schemas.get(stream_id))
 
+    # pylint: disable=too-many-branches
     def __validate_stream_trans(self, stream_id: str, stream_schema: Union[Schema, Dict]):
         """
         Validation of each stream's transformations
@@ -307,15 +710,36 @@ def main_impl():
     Main implementation
     """
     args = utils.parse_args(REQUIRED_CONFIG_KEYS)
-    trans_config = {'transformations': args.config['transformations']}
+    trans_config = {
+        'transformations': args.config['transformations'],
+        'json_decoder': args.json_decoder or args.config.get('json_decoder'),
+        'max_output_buffer_bytes': args.config.get('max_output_buffer_bytes'),
+        'binary_io': True,
+        'pipelined': args.pipelined or args.config.get('pipelined', False),
+        'max_queue_size': args.config.get('max_queue_size'),
+        'workers': args.workers or args.config.get('workers'),
+        'streaming': args.streaming or args.config.get('streaming', False),
+        'flush_interval_seconds': args.config.get('flush_interval_seconds'),
+        'max_batch_bytes': args.config.get('max_batch_bytes'),
+        'max_batch_records': args.config.get('max_batch_records'),
+        'batch_delay_seconds': args.config.get('batch_delay_seconds'),
+        'max_batch_latency_seconds': args.config.get('max_batch_latency_seconds'),
+        'state_emission': args.config.get('state_emission'),
+        'metrics_interval_seconds': args.config.get('metrics_interval_seconds'),
+        'rule_profile_file': args.config.get('rule_profile_file'),
+        'track_latency': args.config.get('track_latency', False),
+        'latency_metrics_file': args.config.get('latency_metrics_file'),
+        'validation_mode': args.config.get('validation_mode'),
+        'stream_validation_modes': args.config.get('stream_validation_modes'),
+        'validation_scope': args.config.get('validation_scope'),
+    }
 
     instance = TransformField(trans_config)
 
     if args.validate:
         instance.validate(args.catalog)
     else:
-        reader = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
-        instance.consume(reader)
+        instance.consume(utils.read_lines(sys.stdin.buffer))
 
     LOGGER.info("Exiting normally")
 
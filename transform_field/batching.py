@@ -0,0 +1,65 @@
+import singer
+
+LOGGER = singer.get_logger('transform_field')
+
+# Bounds of the batch size chosen by the adaptive controller
+MIN_BATCH_RECORDS = 100
+INITIAL_BATCH_RECORDS = 1000
+
+# Weight of the last batch in the smoothed cost per record, lower values react slower but are more stable
+SMOOTHING = 0.3
+
+# Maximum factor of growing or shrinking the batch size after a batch, to avoid oscillations
+MAX_STEP_FACTOR = 2.0
+
+
+class AdaptiveBatchSize:  # pylint: disable=too-few-public-methods
+    """
+    Tunes the maximum number of records of a batch at runtime, aiming at a maximum latency of the
+    records while keeping batches as large as possible for throughput. The latency of the first
+    record of a batch is the time spent filling the batch plus the time of transforming and writing
+    it, all of them growing with the number of records of the batch.
+    """
+
+    def __init__(self, max_records: int, max_latency_seconds: float, min_records: int = MIN_BATCH_RECORDS):
+        self.max_records = max_records
+        self.min_records = min(min_records, max_records)
+        self.max_latency_seconds = max_latency_seconds
+        self.records = max(self.min_records, min(INITIAL_BATCH_RECORDS, max_records))
+        # Smoothed seconds spent per record in filling, transforming and writing the batches
+        self.seconds_per_record = None
+
+    def update(self, num_records: int, fill_seconds: float, transform_seconds: float, write_seconds: float) -> int:
+        """
+        Choose the size of the next batch from the measured times of the last batch
+        :param num_records: number of messages in the last batch
+        :param fill_seconds: seconds elapsed from the previous batch until flushing the last batch
+        :param transform_seconds: seconds spent on transforming and validating the last batch
+        :param write_seconds: seconds spent on writing the last batch
+        :return: maximum number of records of the next batch
+        """
+        if num_records <= 0:
+            return self.records
+
+        seconds_per_record = (fill_seconds + transform_seconds + write_seconds) / num_records
+        if self.seconds_per_record is None:
+            self.seconds_per_record = seconds_per_record
+        else:
+            self.seconds_per_record = SMOOTHING * seconds_per_record + (1 - SMOOTHING) * self.seconds_per_record
+
+        if self.seconds_per_record > 0:
+            target_records = self.max_latency_seconds / self.seconds_per_record
+        else:
+            target_records = self.max_records
+
+        target_records = min(target_records, self.records * MAX_STEP_FACTOR)
+        target_records = max(target_records, self.records / MAX_STEP_FACTOR)
+        records = int(max(self.min_records, min(self.max_records, target_records)))
+
+        LOGGER.debug('Batch of %d records: %.3fs filling, %.3fs transforming, %.3fs writing, '
+                     '%.6fs per record on average, batch size changed from %d to %d records',
+                     num_records, fill_seconds, transform_seconds, write_seconds,
+                     self.seconds_per_record, self.records, records)
+
+        self.records = records
+        return records
@@ -0,0 +1,66 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+# Default budget of a memo cache
+DEFAULT_CACHE_MAX_ENTRIES = 10000
+DEFAULT_CACHE_MAX_BYTES = 10000000
+
+
+class MemoCache:
+    """
+    Bounded memo cache of the results of a value transformer, evicting the least recently used
+    results when the number of entries or the size of the cached keys and results exceeds the
+    budget. Sizes are counted in characters of the keys and results, as they are strings.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def wrap(self, transform_value: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Put the cache in front of a value transformer"""
+        entries = self.entries
+
+        def cached(value: Any) -> Any:
+            try:
+                transformed = entries[value]
+            except KeyError:
+                self.misses += 1
+                transformed = transform_value(value)
+                self.add(value, transformed)
+                return transformed
+
+            entries.move_to_end(value)
+            self.hits += 1
+            return transformed
+
+        return cached
+
+    def add(self, value: Any, transformed: Any):
+        """Cache the result of a value, evicting the least recently used results if over budget"""
+        size = len(value) + len(transformed)
+        if size > self.max_bytes:
+            return
+
+        self.entries[value] = transformed
+        self.size_bytes += size
+
+        while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            evicted_value, evicted_transformed = self.entries.popitem(last=False)
+            self.size_bytes -= len(evicted_value) + len(evicted_transformed)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Counters of the cache"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'bytes': self.size_bytes,
+        }
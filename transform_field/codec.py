@@ -0,0 +1,195 @@
+import json
+import simplejson
+import ciso8601
+import singer
+
+from collections import namedtuple
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+LOGGER = singer.get_logger('transform_field')
+
+# Decoder of incoming JSON lines
+#  loads: function parsing a str or bytes line into python objects, every non-integer number into Decimal
+JsonDecoder = namedtuple('JsonDecoder', ['name', 'loads'])
+
+DEFAULT_JSON_DECODER = 'simplejson'
+JSON_DECODERS = ('auto', 'simplejson', 'json', 'orjson')
+
+
+def _loads_simplejson(line: Union[str, bytes]) -> Any:
+    return simplejson.loads(line, use_decimal=True)
+
+
+def _loads_json(line: Union[str, bytes]) -> Any:
+    return json.loads(line, parse_float=Decimal)
+
+
+def _has_float(obj: Any) -> bool:
+    """
+    Checks if an object decoded by orjson has a float, walking nested dictionaries and lists.
+    orjson decodes only to exact builtin types, compared by type for speed.
+    """
+    # pylint: disable=unidiomatic-typecheck
+    if type(obj) is float:
+        return True
+
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if type(obj) is dict:
+            obj = obj.values()
+        elif type(obj) is not list:
+            continue
+
+        for value in obj:
+            value_type = type(value)
+            if value_type is float:
+                return True
+
+            if value_type is dict or value_type is list:
+                stack.append(value)
+
+    return False
+
+
+def _loads_orjson(line: Union[str, bytes]) -> Any:
+    """
+    Decode lines by orjson, and by the standard library the lines orjson decodes lossily or rejects:
+    numbers with a fraction or an exponent and integers out of the 64 bit range are decoded to float
+    by orjson, and lone surrogates, NaN or numbers out of the double range, which singer-python
+    accepts, are rejected
+    """
+    try:
+        obj = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return _loads_json(line)
+
+    if _has_float(obj):
+        return _loads_json(line)
+
+    return obj
+
+
+def get_json_decoder(name: Optional[str] = None) -> JsonDecoder:
+    """
+    Get a JSON decoder by name
+    Args:
+        name: one of JSON_DECODERS, defaults to the simplejson decoder used by singer-python.
+              `auto` is the fastest installed decoder, `orjson` falls back to the standard
+              library if orjson is not installed. Every decoder decodes numbers exactly.
+
+    Returns:
+        JsonDecoder
+    """
+    name = name or DEFAULT_JSON_DECODER
+
+    if name not in JSON_DECODERS:
+        raise ValueError(f'Unknown JSON decoder `{name}`, supported decoders are {", ".join(JSON_DECODERS)}')
+
+    if name in ('auto', 'orjson'):
+        if orjson is not None:
+            return JsonDecoder('orjson', _loads_orjson)
+
+        if name == 'orjson':
+            LOGGER.warning('orjson is not installed, falling back to the standard json decoder')
+
+        name = 'json'
+
+    if name == 'json':
+        return JsonDecoder('json', _loads_json)
+
+    return JsonDecoder('simplejson', _loads_simplejson)
+
+
+def _required_key(obj: Dict, key: str) -> Any:
+    if key not in obj:
+        raise Exception(f"Message is missing required key '{key}': {obj}")
+
+    return obj[key]
+
+
+def _parse_time_extracted(obj: Dict):
+    time_extracted = obj.get('time_extracted')
+    if time_extracted:
+        try:
+            time_extracted = ciso8601.parse_datetime(time_extracted)
+        except Exception:
+            LOGGER.warning('unable to parse time_extracted with ciso8601 library')
+            time_extracted = None
+
+    return time_extracted
+
+
+def parse_message(line: Union[str, bytes], decoder: JsonDecoder) -> Optional[singer.Message]:
+    """
+    Parse a line into a singer Message object, the same way as singer.parse_message
+    but using the given JSON decoder
+    Args:
+        line: raw line to parse
+        decoder: JSON decoder to use
+
+    Returns:
+        singer Message or None if the message type is unknown
+    """
+    obj = decoder.loads(line)
+    msg_type = _required_key(obj, 'type')
+
+    if msg_type == 'RECORD':
+        return singer.RecordMessage(stream=_required_key(obj, 'stream'),
+                                    record=_required_key(obj, 'record'),
+                                    version=obj.get('version'),
+                                    time_extracted=_parse_time_extracted(obj))
+
+    if msg_type == 'SCHEMA':
+        return singer.SchemaMessage(stream=_required_key(obj, 'stream'),
+                                    schema=_required_key(obj, 'schema'),
+                                    key_properties=_required_key(obj, 'key_properties'),
+                                    bookmark_properties=obj.get('bookmark_properties'))
+
+    if msg_type == 'STATE':
+        return singer.StateMessage(value=_required_key(obj, 'value'))
+
+    if msg_type == 'ACTIVATE_VERSION':
+        return singer.ActivateVersionMessage(stream=_required_key(obj, 'stream'),
+                                             version=_required_key(obj, 'version'))
+
+    if msg_type == 'BATCH':
+        return singer.BatchMessage(stream=_required_key(obj, 'stream'),
+                                   filepath=_required_key(obj, 'filepath'),
+                                   file_format=_required_key(obj, 'format'),
+                                   compression=obj.get('compression'),
+                                   batch_size=obj.get('batch_size'),
+                                   time_extracted=_parse_time_extracted(obj))
+
+    return None
+
+
+def _default(value: Any) -> Any:
+    """Serialise values that are not JSON types but can appear in transformed records"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+# Same settings as singer.format_message uses, built only once
+_ENCODER = simplejson.JSONEncoder(use_decimal=True, default=_default)
+
+
+def format_message(message: singer.Message) -> str:
+    """
+    Serialise a singer Message object into a JSON line, without the trailing new line
+    Args:
+        message: singer Message to serialise
+
+    Returns:
+        JSON string
+    """
+    return _ENCODER.encode(message.asdict())
@@ -0,0 +1,184 @@
+import json
+import time
+import singer
+
+from typing import Dict, Iterable, Optional
+
+from singer.metrics import Point
+
+from transform_field.timings import Timings
+
+# Interval of logging the metrics, the same as singer-python counters
+DEFAULT_METRICS_INTERVAL_SECONDS = 60.0
+
+
+class Metrics:
+    """
+    Counts the records and bytes of every stream and logs them as Singer metric log lines at
+    a regular interval, together with the records per second of every stream, the time
+    spent in every phase since the previous log and the latency histograms if tracked
+    """
+
+    def __init__(self, logger, timings: Timings, interval_seconds: float = DEFAULT_METRICS_INTERVAL_SECONDS,
+                 latency: Optional['LatencyTracker'] = None):
+        self.logger = logger
+        self.timings = timings
+        # Optional latency histograms, logged with the other metrics
+        self.latency = latency
+        self.interval_seconds = interval_seconds
+        # Mapping from stream name to its number of records and bytes since the last log
+        self.streams = {}
+        self.last_timings = dict(timings.timings)
+        self.time_last_logged = time.time()
+
+    def count(self, stream: str, num_bytes: int):
+        """Count a record of a stream"""
+        counters = self.streams.get(stream)
+        if counters is None:
+            counters = self.streams[stream] = [0, 0]
+
+        counters[0] += 1
+        counters[1] += num_bytes
+
+    def log_if_due(self):
+        """Log the metrics if the interval has elapsed since the last log"""
+        if time.time() - self.time_last_logged >= self.interval_seconds:
+            self.log()
+
+    def log(self):
+        """Log the metrics since the last log and reset the counters"""
+        now = time.time()
+        elapsed_seconds = now - self.time_last_logged
+
+        for stream, (num_records, num_bytes) in self.streams.items():
+            if num_records:
+                tags = {'stream': stream}
+                singer.metrics.log(self.logger, Point('counter', 'record_count', num_records, tags))
+                singer.metrics.log(self.logger, Point('counter', 'byte_count', num_bytes, tags))
+                singer.metrics.log(self.logger, Point(
+                    'gauge', 'records_per_second', round(num_records / elapsed_seconds, 3) if elapsed_seconds else 0,
+                    tags))
+
+        for phase, seconds in self.timings.timings.items():
+            singer.metrics.log(self.logger, Point(
+                'timer', 'phase_duration', round(seconds - self.last_timings[phase], 6), {'phase': phase}))
+
+        if self.latency is not None:
+            self.latency.log(self.logger)
+
+        self.streams = {stream: [0, 0] for stream in self.streams}
+        self.last_timings = dict(self.timings.timings)
+        self.time_last_logged = now
+
+
+# Values in a histogram bucket differ by less than 1 / 2 ** (HISTOGRAM_PRECISION_BITS - 1), i.e. 0.8%
+HISTOGRAM_PRECISION_BITS = 8
+
+# Percentiles reported for every histogram
+PERCENTILES = (50, 90, 99)
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in the way of HDR histograms: durations are counted in microsecond
+    buckets whose width grows with the duration, up to 1/128 of the durations in the bucket, with
+    a small and bounded number of buckets. Percentiles are reported at the lowest duration of their
+    bucket, so they are lower than the actual durations by less than 1%, besides the microsecond
+    rounded down.
+    """
+
+    def __init__(self):
+        # Mapping from the lowest duration of a bucket in microseconds to the number of durations in it
+        self.buckets = {}
+        self.count = 0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float):
+        """Count a duration"""
+        micros = int(seconds * 1000000) if seconds > 0 else 0
+        shift = micros.bit_length() - HISTOGRAM_PRECISION_BITS
+        if shift > 0:
+            micros = (micros >> shift) << shift
+
+        self.buckets[micros] = self.buckets.get(micros, 0) + 1
+        self.count += 1
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentiles(self) -> Dict[str, float]:
+        """Durations in seconds at the reported percentiles and the maximum duration"""
+        summary = {'count': self.count}
+        bucket_iter = iter(sorted(self.buckets.items()))
+        micros, seen = 0, 0
+
+        for percentile in PERCENTILES:
+            while seen < self.count * percentile / 100:
+                micros, count = next(bucket_iter)
+                seen += count
+
+            summary[f'p{percentile}'] = micros / 1000000
+
+        summary['max'] = round(self.max_seconds, 6)
+        return summary
+
+
+class LatencyTracker:
+    """
+    Measures for every stream the latency of the records, from reading them to writing them
+    to stdout, and the duration of flushing the batches having records of the stream
+    """
+
+    def __init__(self):
+        # Stream and time of reading of every record not written to stdout yet
+        self.pending = []
+        self.record_latency = {}
+        self.flush_duration = {}
+
+    def read(self, stream: str):
+        """Start measuring the latency of a record that has just been read"""
+        self.pending.append((stream, time.monotonic()))
+
+    def written(self):
+        """Finish measuring the latency of every pending record, called after writing them to stdout"""
+        now = time.monotonic()
+        histograms = self.record_latency
+
+        for stream, time_read in self.pending:
+            histogram = histograms.get(stream)
+            if histogram is None:
+                histogram = histograms[stream] = LatencyHistogram()
+
+            histogram.record(now - time_read)
+
+        self.pending = []
+
+    def flushed(self, streams: Iterable[str], seconds: float):
+        """Count the duration of flushing a batch for every stream having records in the batch"""
+        for stream in streams:
+            if stream not in self.flush_duration:
+                self.flush_duration[stream] = LatencyHistogram()
+
+            self.flush_duration[stream].record(seconds)
+
+    def report(self) -> Dict[str, Dict]:
+        """Percentiles of the histograms of every stream"""
+        return {
+            stream: {
+                'record_latency_seconds': histogram.percentiles(),
+                'flush_duration_seconds': self.flush_duration[stream].percentiles()
+                if stream in self.flush_duration else None,
+            }
+            for stream, histogram in self.record_latency.items()
+        }
+
+    def log(self, logger):
+        """Log the percentiles of the histograms of every stream"""
+        for stream, report in self.report().items():
+            for name, summary in report.items():
+                if summary:
+                    logger.info('Stream %s %s: %s', stream, name,
+                                ', '.join(f'{key}={value}' for key, value in summary.items()))
+
+    def dump(self, path: str):
+        """Write the percentiles of the histograms of every stream to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as metrics_file:
+            json.dump({'streams': self.report()}, metrics_file, indent=2)
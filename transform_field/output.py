@@ -0,0 +1,54 @@
+import sys
+import singer
+
+from typing import Union
+
+from transform_field import codec
+
+DEFAULT_MAX_BUFFER_BYTES = 4000000
+
+
+class OutputWriter:
+    """
+    Buffers serialised messages and writes them to stdout in bulk, issuing a single
+    write and a single flush per batch instead of one per message.
+    In binary mode lines are kept as bytes and written to the binary buffer of stdout,
+    so raw input lines are never decoded and encoded again.
+    """
+
+    def __init__(self, max_buffer_bytes: int = DEFAULT_MAX_BUFFER_BYTES, binary: bool = False):
+        self.max_buffer_bytes = max_buffer_bytes
+        self.binary = binary
+        self.newline = b'\n' if binary else '\n'
+        self.lines = []
+        self.buffer_size_bytes = 0
+
+    def write_message(self, message: singer.Message):
+        """Serialise a message and add it to the buffer"""
+        line = codec.format_message(message) + '\n'
+        self.write_line(line.encode('utf-8') if self.binary else line)
+
+    def write_line(self, line: Union[str, bytes]):
+        """Add a raw line to the buffer as it is, writing the buffer out when it's full"""
+        if not line.endswith(self.newline):
+            line += self.newline
+
+        self.lines.append(line)
+        self.buffer_size_bytes += len(line)
+
+        if self.buffer_size_bytes >= self.max_buffer_bytes:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered line to stdout"""
+        if self.lines:
+            # stdout is looked up on every flush as it can be replaced, e.g. in tests
+            out = sys.stdout.buffer if self.binary else sys.stdout
+            out.write(self.newline[:0].join(self.lines))
+            out.flush()
+
+            self.lines = []
+            self.buffer_size_bytes = 0
+
+    def join(self):
+        """Wait until every flushed buffer has been written, flushed buffers are written immediately"""
@@ -0,0 +1,205 @@
+import sys
+import queue
+import threading
+import singer
+
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from transform_field.output import OutputWriter, DEFAULT_MAX_BUFFER_BYTES
+
+LOGGER = singer.get_logger('transform_field')
+
+DEFAULT_MAX_QUEUE_SIZE = 16
+DEFAULT_READ_CHUNK_LINES = 1000
+
+# Marks the end of a queue
+_END = object()
+
+# Timeout of blocking queue operations, to check regularly if the other side has stopped
+_QUEUE_TIMEOUT_SECONDS = 0.1
+
+
+def _put(items: queue.Queue, item, stopped: threading.Event) -> bool:
+    """Put an item into a bounded queue, waiting for free space unless stopped. Returns False if stopped."""
+    while not stopped.is_set():
+        try:
+            items.put(item, timeout=_QUEUE_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            pass
+
+    return False
+
+
+def read_in_background(reader: Iterable[Union[str, bytes]],
+                       max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+                       chunk_lines: int = DEFAULT_READ_CHUNK_LINES,
+                       check: Optional[Callable[[], None]] = None) -> Iterator[Union[str, bytes]]:
+    """
+    Read lines in a background thread, so reading the input overlaps with processing it.
+    Whenever it needs more lines the consuming thread takes every line read so far in a single
+    chunk, so lines are never held back waiting for a chunk to fill, and the reader thread waits
+    when `max_queue_size` * `chunk_lines` lines are read ahead.
+    :param reader: iterable of lines, e.g. lines of stdin
+    :param max_queue_size: maximum number of chunks read ahead
+    :param chunk_lines: number of lines in a chunk
+    :param check: optional function called regularly while waiting for lines, an exception
+                  raised by it stops reading even if no more line arrives
+    :return: Iterator of the lines in the same order as in reader
+    """
+    max_lines = max_queue_size * chunk_lines
+    ready = threading.Condition(threading.Lock())
+    stopped = threading.Event()
+    pending = []
+    done = False
+    error = None
+    # True while the consuming thread waits for lines, the reader thread notifies it only then
+    waiting = False
+
+    def read():
+        nonlocal done, error
+
+        try:
+            for line in reader:
+                with ready:
+                    while len(pending) >= max_lines:
+                        if stopped.is_set():
+                            return
+                        ready.wait(_QUEUE_TIMEOUT_SECONDS)
+
+                    pending.append(line)
+                    if waiting:
+                        ready.notify()
+
+        except Exception as exc:
+            # Raised again in the consuming thread after the lines read before it
+            error = exc
+
+        finally:
+            with ready:
+                done = True
+                ready.notify()
+
+    thread = threading.Thread(target=read, name='transform-field-reader', daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            with ready:
+                while not pending and not done:
+                    waiting = True
+                    try:
+                        timed_out = not ready.wait(_QUEUE_TIMEOUT_SECONDS)
+                    finally:
+                        waiting = False
+
+                    if timed_out and check is not None:
+                        check()
+
+                lines = pending[:]
+                del pending[:]
+                ready.notify()
+
+            if not lines:
+                if error is not None:
+                    raise error
+                break
+
+            yield from lines
+
+    finally:
+        # Stops the reader thread if the lines are not consumed till the end
+        stopped.set()
+
+
+class ThreadedOutputWriter(OutputWriter):
+    """
+    OutputWriter writing the flushed buffers to stdout in a background thread, so writing
+    the output overlaps with processing the input. Flushed buffers are passed through a
+    bounded queue, flush waits when the queue is full.
+    """
+
+    def __init__(self,
+                 max_buffer_bytes: int = DEFAULT_MAX_BUFFER_BYTES,
+                 binary: bool = False,
+                 max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE):
+        super().__init__(max_buffer_bytes, binary)
+        self.buffers = queue.Queue(maxsize=max_queue_size)
+        self.stopped = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self.write, name='transform-field-writer', daemon=True)
+        self.thread.start()
+
+    def write(self):
+        """Write the flushed buffers to their output in order, runs in the writer thread"""
+        while True:
+            item = self.buffers.get()
+            if item is _END:
+                break
+
+            out, data = item
+            try:
+                out.write(data)
+                out.flush()
+            except Exception as exc:
+                # Raised again in the transforming thread by the next flush or join
+                self.error = exc
+                self.stopped.set()
+                break
+
+    def flush(self):
+        """Pass every buffered line to the writer thread"""
+        if self.error:
+            raise self.error
+
+        if self.lines:
+            # stdout is looked up on every flush as it can be replaced, e.g. in tests
+            out = sys.stdout.buffer if self.binary else sys.stdout
+            _put(self.buffers, (out, self.newline[:0].join(self.lines)), self.stopped)
+
+            self.lines = []
+            self.buffer_size_bytes = 0
+
+    def join(self):
+        """Wait until the writer thread has written every flushed buffer and stop it"""
+        _put(self.buffers, _END, self.stopped)
+        self.thread.join()
+
+        if self.error:
+            raise self.error
+
+
+class FlushTimer:
+    """
+    Calls a function at a regular interval in a background thread, e.g. to flush the buffers
+    when no new message arrives. An exception raised by the function is logged, stops the timer
+    and is kept in `error` to be raised again in the main thread by `raise_error`.
+    """
+
+    def __init__(self, interval_seconds: float, callback: Callable[[], None]):
+        self.interval_seconds = interval_seconds
+        self.callback = callback
+        self.stopped = threading.Event()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name='transform-field-timer', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """Call the function at every interval until stopped, runs in the timer thread"""
+        while not self.stopped.wait(self.interval_seconds):
+            try:
+                self.callback()
+            except Exception as exc:
+                LOGGER.critical('Flushing in the background failed: %s', exc, exc_info=True)
+                self.error = exc
+                break
+
+    def raise_error(self):
+        """Raise the exception of the function again, if it has failed"""
+        if self.error:
+            raise self.error
+
+    def stop(self):
+        """Stop the timer thread and wait until it ends"""
+        self.stopped.set()
+        self.thread.join()
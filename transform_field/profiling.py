@@ -0,0 +1,86 @@
+import json
+import time
+
+from typing import Any, Callable, Dict, List
+
+
+class RuleProfile:
+    """
+    Counters of a transformation rule: evaluations, records matching its `when` conditions,
+    values changed, exceptions swallowed and cumulative time of applying it
+    """
+
+    def __init__(self, stream: str, field_id: str, trans_type: str):
+        self.rule = (stream, field_id, trans_type)
+        self.evaluations = 0
+        self.matches = 0
+        self.changes = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    def count_matches(self, is_required: Callable[[Dict], bool]) -> Callable[[Dict], bool]:
+        """Wrap the conditions of the rule to count the records matching them"""
+        def count(record: Dict) -> bool:
+            matched = is_required(record)
+            if matched:
+                self.matches += 1
+
+            return matched
+
+        return count
+
+    def count_error(self):
+        """Count an exception swallowed while applying the rule"""
+        self.errors += 1
+
+    def profile(self, apply: Callable[[Dict], bool]) -> Callable[[Dict], bool]:
+        """Wrap the compiled rule to count its evaluations and changes and to time it"""
+        def profiled(record: Dict) -> bool:
+            start = time.perf_counter()
+            changed = apply(record)
+            self.seconds += time.perf_counter() - start
+            self.evaluations += 1
+            if changed:
+                self.changes += 1
+
+            return changed
+
+        return profiled
+
+    def asdict(self) -> Dict[str, Any]:
+        """Counters of the rule as a dictionary"""
+        stream, field_id, trans_type = self.rule
+        return {
+            'tap_stream_name': stream,
+            'field_id': field_id,
+            'type': trans_type,
+            'evaluations': self.evaluations,
+            'when_matches': self.matches,
+            'changes': self.changes,
+            'errors': self.errors,
+            'seconds': round(self.seconds, 6),
+        }
+
+
+class RuleProfiler:
+    """Collects the profiles of every transformation rule and writes them as a JSON report"""
+
+    def __init__(self):
+        self.profiles: List[RuleProfile] = []
+
+    def add(self, stream: str, field_id: str, trans_type: str) -> RuleProfile:
+        """Add the profile of a rule"""
+        profile = RuleProfile(stream, field_id, trans_type)
+        self.profiles.append(profile)
+        return profile
+
+    def report(self) -> Dict[str, Any]:
+        """Profiles of every rule, the most expensive first"""
+        return {
+            'rules': [profile.asdict() for profile in sorted(self.profiles, key=lambda profile: -profile.seconds)]
+        }
+
+    def dump(self, path: str):
+        """Write the report to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.report(), report_file, indent=2)
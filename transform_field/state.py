@@ -0,0 +1,99 @@
+import time
+import singer
+
+from typing import Any, Optional, Tuple, Union
+
+from transform_field.output import OutputWriter
+
+# State emission policies, the last state is always emitted with every flushed batch
+#  flush: only with every flushed batch
+#  records:N: also as soon as N records have been written since the previous state
+#  seconds:T: also as soon as T seconds have elapsed since the previous state
+STATE_EMISSION_FLUSH = 'flush'
+STATE_EMISSION_RECORDS = 'records'
+STATE_EMISSION_SECONDS = 'seconds'
+
+
+def parse_state_emission(policy: str) -> Tuple[str, Optional[Union[int, float]]]:
+    """
+    Parse a state emission policy
+    :param policy: one of `flush`, `records:N` or `seconds:T`
+    :return: name of the policy and its parameter, None for the flush policy
+    """
+    name, _, param = policy.partition(':')
+
+    if name == STATE_EMISSION_FLUSH and not param:
+        return name, None
+
+    try:
+        if name == STATE_EMISSION_RECORDS and int(param) >= 1:
+            return name, int(param)
+
+        if name == STATE_EMISSION_SECONDS and float(param) >= 0:
+            return name, float(param)
+
+    except ValueError:
+        pass
+
+    raise ValueError(f'Invalid state emission policy `{policy}`, supported policies are '
+                     f'{STATE_EMISSION_FLUSH}, {STATE_EMISSION_RECORDS}:N and {STATE_EMISSION_SECONDS}:T')
+
+
+class StateEmitter:
+    """
+    Writes STATE messages according to the state emission policy. States are added only once
+    every record received before them has been written, so a state is never written before
+    the records preceding it. Only the last added state is written, earlier ones not yet
+    written are superseded by it.
+    """
+
+    def __init__(self, writer: OutputWriter, policy: Optional[str] = None):
+        self.writer = writer
+        self.policy, self.param = parse_state_emission(policy or STATE_EMISSION_FLUSH)
+        # Last state that can be written, None if there is no state to write
+        self.state = None
+        self.records = 0
+        self.time_last_emitted = time.monotonic()
+
+    def add(self, state: Any):
+        """Add a state whose preceding records have all been written"""
+        self.state = state
+
+    def is_due(self) -> bool:
+        """Check if the policy requires writing the last state, regardless of batches"""
+        if self.policy == STATE_EMISSION_RECORDS:
+            return self.records >= self.param
+
+        if self.policy == STATE_EMISSION_SECONDS:
+            return time.monotonic() - self.time_last_emitted >= self.param
+
+        return False
+
+    def record_written(self):
+        """Count a written record, writing the last state if it's due"""
+        self.records += 1
+
+        if self.state and self.is_due():
+            self.emit()
+
+    def flushed(self):
+        """Write the last state at the end of a batch, under every policy"""
+        if self.state:
+            self.emit()
+
+    def idle(self):
+        """Write the last state if it's due while no record is written"""
+        if self.state and self.is_due():
+            self.emit()
+
+    def finish(self):
+        """Write the last state at the end of the input"""
+        if self.state:
+            self.emit()
+
+    def emit(self):
+        """Write the last state"""
+        self.writer.write_message(singer.StateMessage(self.state))
+        self.state = None
+        self.records = 0
+        self.time_last_emitted = time.monotonic()
@@ -4,34 +4,45 @@ import time
 
 from contextlib import contextmanager
 
+# Phases of processing the messages, timed separately
+PHASES = ('parsing', 'transforming', 'validating', 'writing')
+
 
 class Timings:
-    """Gathers timing information for the three main steps of the Transformer."""
+    """Gathers timing information for the main steps of the Transformer."""
 
     def __init__(self, logger):
         self.logger = logger
-        self.last_time = time.time()
-        self.timings = {
-            'validating': 0.0,
-            'transforming': 0.0,
-            None: 0.0
-        }
+        self.start_time = time.time()
+        self.timings = {phase: 0.0 for phase in PHASES}
 
     @contextmanager
     def mode(self, mode):
-        """We wrap the big steps of the Tap in this context manager to accumulate
+        """We wrap the big steps of the Transformer in this context manager to accumulate
         timing info."""
 
-        start = time.time()
-        yield
-        end = time.time()
-        self.timings[None] += start - self.last_time
-        self.timings[mode] += end - start
-        self.last_time = end
-
-    def log_timings(self):
-        """We call this with every flush to print out the accumulated timings"""
-        self.logger.debug('Timings: unspecified: %.3f; validating: %.3f; transforming: %.3f;',
-                          self.timings[None],
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[mode] += time.perf_counter() - start
+
+    def add(self, mode, seconds):
+        """Accumulate the time of a step timed by the caller, for steps too short for the context manager"""
+        self.timings[mode] += seconds
+
+    def log_timings(self, caches=None):
+        """We call this with every flush to print out the accumulated timings, and the counters
+        of the memo caches of the transformations if any"""
+        unspecified = time.time() - self.start_time - sum(self.timings.values())
+        self.logger.debug('Timings: unspecified: %.3f; parsing: %.3f; transforming: %.3f; validating: %.3f; '
+                          'writing: %.3f;',
+                          unspecified,
+                          self.timings['parsing'],
+                          self.timings['transforming'],
                           self.timings['validating'],
-                          self.timings['transforming'])
+                          self.timings['writing'])
+
+        for name, cache in (caches or {}).items():
+            self.logger.debug('Cache %s: hits: %d; misses: %d; evictions: %d; entries: %d; bytes: %d;',
+                              name, *cache.stats().values())
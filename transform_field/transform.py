@@ -1,11 +1,17 @@
+import calendar
 import hashlib
 import re
 
-from typing import Dict, Any, Optional, List
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Callable, Iterable, Tuple, Union
 from dpath.util import get as get_xpath, set as set_xpath
 from singer import get_logger
 from dateutil import parser
 
+from transform_field.cache import MemoCache, DEFAULT_CACHE_MAX_BYTES, DEFAULT_CACHE_MAX_ENTRIES
+from transform_field.errors import InvalidTransformationException
+from transform_field.profiling import RuleProfile, RuleProfiler
+
 LOGGER = get_logger('transform_field')
 
 
@@ -15,92 +21,100 @@ def is_transform_required(record: Dict, when: Optional[List[Dict]]) -> bool:
         the defined conditions and the actual values in a record.
         All conditions in when need to be met for the transformation to be required.
     """
-    if not when:
-        # Transformation is always required if 'when' condition not defined
-        LOGGER.debug('No conditions, transformations is required')
-        return True
-
-    transform_required = False
+    return compile_conditions(when)(record)
 
-    # Check if conditional transformation matches criteria
-    # Evaluate every condition
-    for condition in when:
-        column_to_match = condition['column']
-        column_value = record.get(column_to_match, "")
 
-        field_path_to_match = condition.get('field_path')
-
-        # check if given field exists in the column value
-        if field_path_to_match:
-            try:
-                field_value = get_xpath(column_value, field_path_to_match)
-                LOGGER.debug('field "%s" exists in the value of column "%s"', field_path_to_match, column_to_match)
+def compile_conditions(when: Optional[List[Dict]]) -> Callable[[Dict], bool]:
+    """
+    Compiles the conditions of a transformation into a single predicate on records.
+    Regex patterns are compiled here once, and the predicate stops at the first condition
+    that isn't met.
+    Args:
+        when: list of conditions, all of them need to be met for the transformation to be required
 
-            except KeyError:
-                # KeyError exception means the field doesn't exist, hence we cannot proceed with the
-                # equals/regex match condition, thus the condition isn't met and don't need to do
-                # transformation so breaking prematurely
-                transform_required = False
-
-                LOGGER.debug('field "%s" doesn\'t exists in the value of column "%s", '
-                             'so transformation is not required.', field_path_to_match, column_to_match)
-                break
-
-        cond_equals = condition.get('equals')
-        cond_pattern = condition.get('regex_match')
-
-        # Exact condition
-        if cond_equals:
-            LOGGER.debug('Equals condition found, value is: %s', cond_equals)
-            if field_path_to_match:
-                transform_required = __is_condition_met('equal', cond_equals, field_value)
-            else:
-                transform_required = __is_condition_met('equal', cond_equals, column_value)
+    Returns:
+        predicate taking a record and returning True if the transformation is required
+    """
+    if not when:
+        # Transformation is always required if 'when' condition not defined
+        return lambda record: True
 
-            # Condition isn't met, exit the loop
-            if not transform_required:
-                LOGGER.debug('Equals condition didn\'t match, so transformation is not required.')
-                break
+    checks = [_compile_condition(condition) for condition in when]
 
-        # Regex based condition
-        elif cond_pattern:
-            LOGGER.debug('Regex condition found, pattern is: %s', cond_pattern)
+    # Conditions without equals or regex_match only check the existence of their field_path,
+    # transformation isn't required if there are only such conditions
+    if not any(condition.get('equals') or condition.get('regex_match') for condition in when):
+        return lambda record: False
 
-            if field_path_to_match:
-                transform_required = __is_condition_met('regex', cond_pattern, field_value)
-            else:
-                transform_required = __is_condition_met('regex', cond_pattern, column_value)
+    if len(checks) == 1:
+        return checks[0]
 
-            # Condition isn't met, exit the loop
-            if not transform_required:
-                LOGGER.debug('Regex pattern didn\'t match, so transformation is not required.')
-                break
+    def predicate(record: Dict) -> bool:
+        for check in checks:
+            # Condition isn't met, no need to evaluate the rest
+            if not check(record):
+                return False
 
-    LOGGER.debug('Transformation required? %s', transform_required)
+        return True
 
-    return transform_required
+    return predicate
 
 
-def __is_condition_met(condition_type: str, condition_value: Any, value: Any) -> bool:
+def _compile_condition(condition: Dict) -> Callable[[Dict], bool]:
     """
-    Checks if given value meets the given condition
+    Compiles a single condition into a predicate on records
     Args:
-        condition_type: condition type, could be "equal" or "regex"
-        condition_value: the value of the condition, in case of regex it's the pattern, and
-                         a value to compare to in case of equal
-        value: the target value to run the condition against
+        condition: condition with column, optional field_path and an equals or regex_match operation
 
-    Returns: bool, True of condition is met, False otherwise
+    Returns:
+        predicate taking a record and returning True if the condition is met
     """
+    if 'column' not in condition:
+        raise InvalidTransformationException(f'Condition {condition} is missing the `column` property')
+
+    column_to_match = condition['column']
+    field_path_to_match = condition.get('field_path')
+    cond_equals = condition.get('equals')
+    cond_pattern = condition.get('regex_match')
+
+    # Exact condition
+    if cond_equals:
+        def is_condition_met(value: Any) -> bool:
+            return value == cond_equals
+
+    # Regex based condition
+    elif cond_pattern:
+        try:
+            search = re.compile(cond_pattern).search
+        except re.error as exc:
+            raise InvalidTransformationException(
+                f'Invalid regex pattern `{cond_pattern}` in condition on column `{column_to_match}`: {exc}') from exc
+
+        def is_condition_met(value: Any) -> bool:
+            return bool(search(value))
+
+    else:
+        def is_condition_met(_value: Any) -> bool:
+            return True
+
+    # check if given field exists in the column value
+    if field_path_to_match:
+        get_field_value = compile_field_path_getter(field_path_to_match)
+
+        def check(record: Dict) -> bool:
+            try:
+                field_value = get_field_value(record.get(column_to_match, ""))
+
+            except KeyError:
+                # KeyError exception means the field doesn't exist, hence we cannot proceed with the
+                # equals/regex match condition, thus the condition isn't met
+                return False
 
-    if condition_type == 'equal':
-        return value == condition_value
+            return is_condition_met(field_value)
 
-    if condition_type == 'regex':
-        matcher = re.compile(condition_value)
-        return bool(matcher.search(value))
+        return check
 
-    raise NotImplementedError(f'__is_condition_met is not implemented for condition type "{condition_type}"', )
+    return lambda record: is_condition_met(record.get(column_to_match, ""))
 
 
 def do_transform(record: Dict,
@@ -119,12 +133,11 @@ def do_transform(record: Dict,
         # Do transformation only if required
         if is_transform_required(record, when):
 
-            # transforming fields nested in value dictionary
-            if isinstance(value, dict) and field_paths:
+            # transforming fields nested in value dictionary or array
+            if isinstance(value, (dict, list)) and field_paths:
                 for field_path in field_paths:
                     try:
-                        field_val = get_xpath(value, field_path)
-                        set_xpath(value, field_path, _transform_value(field_val, trans_type))
+                        compile_field_path_updater(field_path)(value, lambda val: _transform_value(val, trans_type))
                     except KeyError:
                         LOGGER.error('Field path %s does not exist', field_path)
 
@@ -144,6 +157,594 @@ def do_transform(record: Dict,
         return return_value
 
 
+def compile_trans_plan(trans_meta: Dict[str, List[Tuple]],
+                       profiler: Optional[RuleProfiler] = None,
+                       caches: Optional[Dict[str, MemoCache]] = None
+                       ) -> Dict[str, List[Callable[[Dict], bool]]]:
+    """
+    Compiles the transformations of every stream into callables with pre-parsed parameters.
+    Transformations of nested fields of the same column are compiled into a single callable
+    walking the column value once, unless they are profiled one by one.
+    Args:
+        trans_meta: mapping from stream name to its list of (field_id, type, when, field_paths[, cache])
+                    transformations
+        profiler: optional profiler collecting the counters of every transformation
+        caches: optional dictionary collecting the memo caches of the transformations by
+                `stream/field_id/type`
+
+    Returns:
+        Dictionary mapping stream name to its list of compiled transformations
+    """
+    trans_plan = {}
+
+    for stream, stream_trans_meta in trans_meta.items():
+        rules = []
+
+        for field_id, trans_type, when, field_paths, *cache_config in stream_trans_meta:
+            memo = make_memo_cache(trans_type, cache_config[0] if cache_config else None)
+            if memo is not None and caches is not None:
+                caches[f'{stream}/{field_id}/{trans_type}'] = memo
+
+            rules.append((field_id, trans_type, when, field_paths, memo))
+
+        if profiler:
+            trans_plan[stream] = [
+                compile_transformation(field_id, trans_type, when, field_paths,
+                                       profile=profiler.add(stream, field_id, trans_type), memo=memo)
+                for field_id, trans_type, when, field_paths, memo in rules]
+        else:
+            trans_plan[stream] = [
+                compile_field_paths_transformations(group) if len(group) > 1 else
+                compile_transformation(*group[0][:4], memo=group[0][4])
+                for group in group_field_paths_transformations(rules)]
+
+    return trans_plan
+
+
+def group_field_paths_transformations(rules: List[Tuple]) -> List[List[Tuple]]:
+    """
+    Groups the transformations of nested fields of the same column, so a group can be applied
+    in a single walk of the column value at the position of its first transformation.
+    A transformation joins the last group of its column only if it can be applied before the
+    transformations between them with the same result, none of its conditions is on its own
+    column, and no field path of the group is the prefix of another one.
+    Args:
+        rules: list of (field_id, type, when, field_paths, memo) transformations in order of application
+
+    Returns:
+        list of groups of transformations in order of application
+    """
+    groups = []
+
+    for rule in rules:
+        field_id, _, when, field_paths, _ = rule
+        columns = _condition_columns(when)
+        target = None
+
+        if _is_groupable(field_paths) and field_id not in columns:
+            for group in reversed(groups):
+                if group[0][0] == field_id:
+                    if _is_groupable(group[0][3]) and not _has_prefix_field_paths(
+                            field_paths, [field_path for other in group for field_path in other[3]]):
+                        target = group
+                    break
+
+                # Transformations of other columns between them must not depend on each other
+                if any(other[0] in columns or field_id in _condition_columns(other[2]) for other in group):
+                    break
+
+        if target is not None:
+            target.append(rule)
+        else:
+            groups.append([rule])
+
+    return groups
+
+
+def _condition_columns(when: Optional[List[Dict]]) -> set:
+    """Returns the columns the conditions of a transformation depend on"""
+    return {condition.get('column') for condition in when or []}
+
+
+def _is_groupable(field_paths: Optional[List[str]]) -> bool:
+    """Checks if field paths can be walked with the other field paths of their column"""
+    return bool(field_paths) and not any(_is_glob(field_path) for field_path in field_paths) and \
+        not _has_prefix_field_paths(field_paths, field_paths)
+
+
+def _has_prefix_field_paths(field_paths: List[str], other_field_paths: List[str]) -> bool:
+    """Checks if a field path may match a parent of a field matched by another field path, in either list"""
+    steps = {_parse_field_path(field_path) for field_path in field_paths}
+    other_steps = steps.union(_parse_field_path(field_path) for field_path in other_field_paths)
+
+    return any(_is_prefix(path, other) or _is_prefix(other, path) for path in steps for other in other_steps)
+
+
+def _is_prefix(shorter: Tuple, longer: Tuple) -> bool:
+    """Checks if the steps of a field path may match a parent of a field matched by longer steps"""
+    return len(shorter) < len(longer) and all(
+        step == other or _is_wildcard(step) or _is_wildcard(other) for step, other in zip(shorter, longer))
+
+
+def compile_field_paths_transformations(rules: List[Tuple]) -> Callable[[Dict], bool]:
+    """
+    Compiles transformations of nested fields of the same column into a callable that walks
+    the column value once, finding every field path in a prefix trie of the field paths,
+    and then applies the transformations in order, as if they were applied one by one.
+    Args:
+        rules: list of (field_id, type, when, field_paths, memo) transformations of the same column,
+               grouped by group_field_paths_transformations
+
+    Returns:
+        callable taking a record and returning True if the transformations changed the record
+    """
+    field_id = rules[0][0]
+    # Transformations of a column value that isn't a dictionary or array, applied one by one
+    fallbacks = [compile_transformation(*rule[:4], memo=rule[4]) for rule in rules]
+    conditions = [compile_conditions(rule[2]) for rule in rules]
+    trie, rule_leaves, num_leaves = _build_trie([rule[3] for rule in rules])
+    transformations = []
+
+    for (_, trans_type, _, _, memo), leaves in zip(rules, rule_leaves):
+        transform_value = get_value_transformer(trans_type)
+        if memo is not None:
+            transform_value = memo.wrap(transform_value)
+
+        transformations.append((transform_value, leaves))
+
+    def apply(record: Dict) -> bool:
+        if field_id not in record:
+            return False
+
+        value = record[field_id]
+        if not isinstance(value, (dict, list)):
+            changed = False
+            for apply_transformation in fallbacks:
+                changed = apply_transformation(record) or changed
+
+            return changed
+
+        required = [_is_required(is_required, record) for is_required in conditions]
+        if not any(required):
+            return False
+
+        slots = [None] * num_leaves
+        _find_slots(value, trie, slots)
+
+        changed = False
+        for (transform_value, leaves), is_required in zip(transformations, required):
+            if is_required and _transform_slots(transform_value, leaves, slots, _ignore_error):
+                changed = True
+
+        return changed
+
+    return apply
+
+
+def _build_trie(field_paths_lists: List[List[str]]) -> Tuple[Tuple, List[List[Tuple[str, int, bool]]], int]:
+    """
+    Builds the prefix trie of the field paths of transformations, numbering every field path as a leaf
+    Args:
+        field_paths_lists: list of field paths of every transformation
+
+    Returns:
+        frozen trie, list of (field path, leaf id, has wildcard) leaves of every transformation and number of leaves
+    """
+    trie = {}
+    rule_leaves = []
+    num_leaves = 0
+
+    for field_paths in field_paths_lists:
+        leaves = []
+        for field_path in field_paths:
+            steps = _parse_field_path(field_path)
+            node = trie
+            for step in steps[:-1]:
+                node = node.setdefault(step, {})
+
+            node.setdefault(steps[-1], []).append(num_leaves)
+            leaves.append((field_path, num_leaves, any(_is_wildcard(step) for step in steps)))
+            num_leaves += 1
+
+        rule_leaves.append(leaves)
+
+    return _freeze_trie(trie), rule_leaves, num_leaves
+
+
+def _freeze_trie(trie: Dict, has_wildcard: bool = False) -> Tuple:
+    """
+    Converts a trie of nested dictionaries to tuples of (key, index, children, leaf ids, has wildcard)
+    for fast walking, leaves below a wildcard can match any number of fields
+    """
+    frozen = []
+
+    for step, node in trie.items():
+        below_wildcard = has_wildcard or _is_wildcard(step)
+        if isinstance(node, list):
+            frozen.append((*step, None, tuple(node), below_wildcard))
+        else:
+            frozen.append((*step, _freeze_trie(node, below_wildcard), None, below_wildcard))
+
+    return tuple(frozen)
+
+
+def _find_slots(obj: Any, trie: Tuple, slots: List[Any]):
+    """
+    Walks obj along the trie, visiting only the branches matching a field path, and sets the
+    (container, key or index) slot of every existing leaf, or the list of slots of every leaf
+    below a wildcard matching at least one field
+    """
+    is_dict = isinstance(obj, dict)
+    if not is_dict and not isinstance(obj, list):
+        return
+
+    for node in trie:
+        key, index, children, leaf_ids, has_wildcard = node
+        if index is not None and index < 0:
+            for slot in _wildcard_slots(obj, index):
+                _visit_slot(obj, slot, node, slots)
+            continue
+
+        if is_dict:
+            if key not in obj:
+                continue
+            slot = key
+
+        elif index is not None and index < len(obj):
+            slot = index
+
+        else:
+            continue
+
+        if children is None and not has_wildcard:
+            for leaf_id in leaf_ids:
+                slots[leaf_id] = (obj, slot)
+        else:
+            _visit_slot(obj, slot, node, slots)
+
+
+def _wildcard_slots(obj: Union[Dict, List], index: int) -> Iterable[Union[str, int]]:
+    """Returns the keys or indices of the values of a dictionary or list matched by a wildcard"""
+    if isinstance(obj, dict):
+        # Wildcard of list items doesn't match dictionary values
+        return () if index == _ANY_ITEM else list(obj)
+
+    return range(len(obj))
+
+
+def _visit_slot(obj: Any, slot: Union[str, int], node: Tuple, slots: List[Any]):
+    """Walks the children of a matched trie node, or sets the slot of its leaves, see _freeze_trie"""
+    _, _, children, leaf_ids, has_wildcard = node
+    if children is not None:
+        _find_slots(obj[slot], children, slots)
+
+    elif not has_wildcard:
+        for leaf_id in leaf_ids:
+            slots[leaf_id] = (obj, slot)
+
+    else:
+        for leaf_id in leaf_ids:
+            if slots[leaf_id] is None:
+                slots[leaf_id] = [(obj, slot)]
+            else:
+                slots[leaf_id].append((obj, slot))
+
+
+def _is_required(is_required: Callable[[Dict], bool], record: Dict) -> bool:
+    """Evaluates the conditions of a transformation, which isn't required if they cannot be evaluated"""
+    try:
+        return is_required(record)
+    except Exception:
+        return False
+
+
+def _transform_slots(transform_value: Callable[[Any], Any],
+                     leaves: List[Tuple[str, int, bool]],
+                     slots: List[Any],
+                     on_error: Callable[[], None]) -> bool:
+    """
+    Transforms the values of the field paths of a transformation in place, keeping the original value
+    of the remaining field paths if cannot transform
+    Args:
+        transform_value: value transformer
+        leaves: (field path, leaf id, has wildcard) leaves of the transformation
+        slots: slots of the leaves found by _find_slots
+        on_error: callback called if cannot transform
+
+    Returns:
+        True if any value changed
+    """
+    changed = False
+
+    try:
+        for field_path, leaf_id, has_wildcard in leaves:
+            slot = slots[leaf_id]
+            if slot is None:
+                # Wildcards matching no field are not errors, arrays can be empty
+                if not has_wildcard:
+                    LOGGER.error('Field path %s does not exist', field_path)
+                continue
+
+            if has_wildcard:
+                if _transform_matches(transform_value, slot):
+                    changed = True
+                continue
+
+            obj, key = slot
+            value = obj[key]
+            transformed = transform_value(value)
+            if _is_changed(value, transformed):
+                obj[key] = transformed
+                changed = True
+
+    except Exception:
+        on_error()
+
+    return changed
+
+
+def _transform_matches(transform_value: Callable[[Any], Any], matches: List[Tuple[Any, Union[str, int]]]) -> bool:
+    """
+    Transforms every field matched by a wildcard field path, either all of them or none
+    if any of them cannot be transformed
+    """
+    transformed_values = [transform_value(obj[key]) for obj, key in matches]
+    changed = False
+
+    for (obj, key), transformed in zip(matches, transformed_values):
+        if _is_changed(obj[key], transformed):
+            obj[key] = transformed
+            changed = True
+
+    return changed
+
+
+def make_memo_cache(trans_type: str, cache_config: Optional[Union[bool, Dict]]) -> Optional[MemoCache]:
+    """
+    Makes the memo cache of a hashing or date masking transformation
+    Args:
+        trans_type: transformation type
+        cache_config: True for a cache with the default budget, or dictionary with the optional
+                      `max_entries` and `max_bytes` budget of the cache
+
+    Returns:
+        MemoCache or None if the transformation has no cache
+    """
+    if not cache_config:
+        return None
+
+    if trans_type not in ('HASH', 'MASK-DATE') and not trans_type.startswith('HASH-SKIP-FIRST'):
+        LOGGER.warning('Cache is supported only by hashing and date masking transformations, ignoring it for %s',
+                       trans_type)
+        return None
+
+    if cache_config is True:
+        cache_config = {}
+
+    return MemoCache(cache_config.get('max_entries') or DEFAULT_CACHE_MAX_ENTRIES,
+                     cache_config.get('max_bytes') or DEFAULT_CACHE_MAX_BYTES)
+
+
+def compile_transformation(field_id: str,
+                           trans_type: str,
+                           when: Optional[List[Dict]] = None,
+                           field_paths: Optional[List[str]] = None,
+                           *,
+                           profile: Optional[RuleProfile] = None,
+                           memo: Optional[MemoCache] = None
+                           ) -> Callable[[Dict], bool]:
+    """
+    Compiles a transformation into a callable that applies it to a record in place.
+    The transformation type is resolved only once, so applying the returned callable
+    to a record doesn't need to dispatch on the transformation type string again.
+    Args:
+        field_id: name of the column to transform
+        trans_type: transformation type to apply
+        when: optional list of conditions when to apply the transformation
+        field_paths: optional list of xpaths to transform within a dictionary or array column value
+        profile: optional counters of the transformation, updated on every call of the callable
+        memo: optional cache of the transformed values
+
+    Returns:
+        callable taking a record and returning True if the transformation changed the record
+    """
+    transform_value = get_value_transformer(trans_type)
+    is_required = compile_conditions(when)
+    on_error = _ignore_error
+    field_path_updaters = [(field_path, compile_field_path_updater(field_path)) for field_path in field_paths or []]
+
+    if memo is not None:
+        transform_value = memo.wrap(transform_value)
+
+    if profile is not None:
+        is_required = profile.count_matches(is_required)
+        on_error = profile.count_error
+
+    def apply(record: Dict) -> bool:
+        if field_id not in record:
+            return False
+
+        value = record[field_id]
+        changed = False
+
+        try:
+            # Do transformation only if required
+            if not is_required(record):
+                return False
+
+            # transforming fields nested in value dictionary or array
+            if isinstance(value, (dict, list)) and field_path_updaters:
+                for field_path, update in field_path_updaters:
+                    try:
+                        if update(value, transform_value):
+                            changed = True
+                    except KeyError:
+                        LOGGER.error('Field path %s does not exist', field_path)
+
+            else:
+                transformed = transform_value(value)
+                if _is_changed(value, transformed):
+                    record[field_id] = transformed
+                    changed = True
+
+        # Keep the original value if cannot transform
+        except Exception:
+            on_error()
+
+        return changed
+
+    return apply if profile is None else profile.profile(apply)
+
+
+# Characters making a field path a glob, such paths are matched by dpath
+_GLOB_CHARACTERS = re.compile(r'[*?[]')
+
+# Indices of the wildcard segments matching every value of a dictionary or list, and every item of a list
+_ANY_VALUE = -1
+_ANY_ITEM = -2
+_WILDCARD_INDICES = {'*': _ANY_VALUE, '[]': _ANY_ITEM}
+
+
+def _parse_field_path(field_path: str) -> Tuple[Tuple[str, Optional[int]], ...]:
+    """
+    Splits a field path into steps the same way as dpath does: a leading separator is ignored, and
+    integer-like segments match the dictionary key of their canonical form or the list index.
+    `*` and `[]` segments are wildcards with a negative index.
+    Args:
+        field_path: xpath of keys separated by `/`
+
+    Returns:
+        tuple of (dictionary key, list index or None) steps
+    """
+    steps = []
+
+    for segment in field_path.lstrip('/').split('/'):
+        if segment in _WILDCARD_INDICES:
+            steps.append((segment, _WILDCARD_INDICES[segment]))
+            continue
+
+        try:
+            index = int(segment)
+        except ValueError:
+            steps.append((segment, None))
+        else:
+            steps.append((str(index), index if index >= 0 else None))
+
+    return tuple(steps)
+
+
+def _is_glob(field_path: str) -> bool:
+    """Checks if a field path is a glob matched by dpath, apart from the wildcard segments"""
+    return field_path == '/' or any(segment not in _WILDCARD_INDICES and _GLOB_CHARACTERS.search(segment)
+                                    for segment in field_path.lstrip('/').split('/'))
+
+
+def _is_wildcard(step: Tuple[str, Optional[int]]) -> bool:
+    """Checks if a step of a field path is a wildcard"""
+    return step[1] is not None and step[1] < 0
+
+
+def _slot(obj: Any, key: str, index: Optional[int]) -> Union[str, int]:
+    """Returns the dictionary key or list index of a step in obj, raises KeyError if obj can't have it"""
+    if isinstance(obj, dict):
+        return key
+
+    if isinstance(obj, list) and index is not None and index < len(obj):
+        return index
+
+    raise KeyError(key)
+
+
+@lru_cache(maxsize=None)
+def compile_field_path_getter(field_path: str) -> Callable[[Any], Any]:
+    """
+    Compiles a field path into a getter walking nested dictionaries and lists directly.
+    Glob paths, including wildcards, are matched by dpath.
+    Args:
+        field_path: xpath of keys separated by `/`
+
+    Returns:
+        callable taking an object and returning the value at the field path, raises KeyError
+        if the field path doesn't exist
+    """
+    if _GLOB_CHARACTERS.search(field_path) or field_path == '/':
+        return lambda obj: get_xpath(obj, field_path)
+
+    steps = _parse_field_path(field_path)
+
+    def get(obj: Any) -> Any:
+        for key, index in steps:
+            obj = obj[_slot(obj, key, index)]
+
+        return obj
+
+    return get
+
+
+@lru_cache(maxsize=None)
+def compile_field_path_updater(field_path: str) -> Callable[[Any, Callable[[Any], Any]], bool]:
+    """
+    Compiles a field path into an updater transforming the value at the field path in place,
+    reading and writing it in the same walk of nested dictionaries and lists. Wildcard segments
+    transform every matching field, glob paths are matched by dpath.
+    Args:
+        field_path: xpath of keys separated by `/`
+
+    Returns:
+        callable taking an object and a value transformer, and returning True if the value
+        changed, raises KeyError if the field path doesn't exist and has no wildcard
+    """
+    if _is_glob(field_path):
+        def update_glob(obj: Any, transform_value: Callable[[Any], Any]) -> bool:
+            value = get_xpath(obj, field_path)
+            transformed = transform_value(value)
+            if _is_changed(value, transformed):
+                set_xpath(obj, field_path, transformed)
+                return True
+
+            return False
+
+        return update_glob
+
+    steps = _parse_field_path(field_path)
+
+    if any(_is_wildcard(step) for step in steps):
+        trie = _build_trie([[field_path]])[0]
+
+        def update_wildcard(obj: Any, transform_value: Callable[[Any], Any]) -> bool:
+            slots = [None]
+            _find_slots(obj, trie, slots)
+            return slots[0] is not None and _transform_matches(transform_value, slots[0])
+
+        return update_wildcard
+
+    *parent_steps, (leaf_key, leaf_index) = steps
+
+    def update(obj: Any, transform_value: Callable[[Any], Any]) -> bool:
+        for key, index in parent_steps:
+            obj = obj[_slot(obj, key, index)]
+
+        slot = _slot(obj, leaf_key, leaf_index)
+        value = obj[slot]
+        transformed = transform_value(value)
+        if _is_changed(value, transformed):
+            obj[slot] = transformed
+            return True
+
+        return False
+
+    return update
+
+
+def _ignore_error():
+    """Error handler of transformations without profile"""
+
+
+def _is_changed(value: Any, transformed: Any) -> bool:
+    """Checks if a transformed value would be serialised differently than the original value"""
+    return transformed is not value and (type(transformed) is not type(value) or transformed != value)
+
+
 def _transform_value(value: Any, trans_type: str) -> Any:
     """
     Applies the given transformation type to the given value
@@ -154,43 +755,144 @@ def _transform_value(value: Any, trans_type: str) -> Any:
     Returns:
         transformed value
     """
-    # Transforms any input to NULL
-    if trans_type == "SET-NULL":
-        return_value = None
+    return get_value_transformer(trans_type)(value)
 
-    # Transforms string input to hash
-    elif trans_type == "HASH":
-        return_value = hashlib.sha256(value.encode('utf-8')).hexdigest()
 
-    # Transforms string input to hash skipping first n characters, e.g. HASH-SKIP-FIRST-2
-    elif 'HASH-SKIP-FIRST' in trans_type:
-        return_value = value[:int(trans_type[-1])] + \
-                       hashlib.sha256(value.encode('utf-8')[int(trans_type[-1]):]).hexdigest()
+def _hash(value: str) -> str:
+    """Transforms string input to hash"""
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
 
-    # Transforms any date to stg
-    elif trans_type == "MASK-DATE":
-        return_value = parser.parse(value).replace(month=1, day=1).isoformat()
 
-    # Transforms any number to zero
-    elif trans_type == "MASK-NUMBER":
-        return_value = 0
+# RFC 3339 dates and date-times, the formats of the `date` and `date-time` JSON schema formats
+_ISO_DATE_TIME = re.compile(r'(\d{4})-(\d{2})-(\d{2})'
+                            r'(?:[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?(Z|[+-]\d{2}:\d{2})?)?', re.ASCII)
+
+_DAYS_IN_MONTH = (0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _mask_iso_date(value: str) -> Optional[str]:  # pylint: disable=too-many-return-statements
+    """
+    Transforms an RFC 3339 date or date-time to the first of January of the same year, without
+    parsing it into a datetime. Gives the same result as dateutil for every string it accepts.
+    Args:
+        value: date or date-time string
+
+    Returns:
+        masked date-time or None if the value is not a valid RFC 3339 date or date-time
+    """
+    match = _ISO_DATE_TIME.fullmatch(value)
+    if match is None:
+        return None
 
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+
+    if year == '0000' or not 1 <= int(month) <= 12 or not 1 <= int(day) <= _DAYS_IN_MONTH[int(month)]:
+        return None
+
+    if month == '02' and day == '29' and not calendar.isleap(int(year)):
+        return None
+
+    if hour is None:
+        return f'{year}-01-01T00:00:00'
+
+    if int(hour) > 23 or int(minute) > 59 or int(second) > 59:
+        return None
+
+    masked = f'{year}-01-01T{hour}:{minute}:{second}'
+
+    # Zero microseconds are omitted by datetime.isoformat
+    if fraction and int(fraction):
+        masked += '.' + fraction.ljust(6, '0')
+
+    if offset:
+        if offset == 'Z' or offset[1:] == '00:00':
+            masked += '+00:00'
+        elif int(offset[1:3]) > 23 or int(offset[4:]) > 59:
+            return None
+        else:
+            masked += offset
+
+    return masked
+
+
+def _mask_date(value: str) -> str:
+    """Transforms any date to the first of January of the same year"""
+    masked = _mask_iso_date(value) if isinstance(value, str) else None
+    if masked is not None:
+        return masked
+
+    # Slow path for any other date format
+    return parser.parse(value).replace(month=1, day=1).isoformat()
+
+
+def _make_hash_skip_first(skip_first_n: int) -> Callable[[str], str]:
+    """Makes a transformer of string input to hash skipping first n characters"""
+
+    def hash_skip_first(value: str) -> str:
+        return value[:skip_first_n] + hashlib.sha256(value.encode('utf-8')[skip_first_n:]).hexdigest()
+
+    return hash_skip_first
+
+
+def _make_mask_string_skip_ends(skip_ends_n: int) -> Callable[[str], str]:
+    """Makes a transformer of string input to masked version skipping first and last n characters"""
+
+    def mask_string_skip_ends(value: str) -> str:
+        value_len = len(value)
+        return '*' * value_len if value_len <= (2 * skip_ends_n) \
+            else f'{value[:skip_ends_n]}{"*" * (value_len - (2 * skip_ends_n))}{value[-skip_ends_n:]}'
+
+    return mask_string_skip_ends
+
+
+# Transformation types with no parameters
+VALUE_TRANSFORMERS = {
+    # Transforms any input to NULL
+    'SET-NULL': lambda value: None,
+    # Transforms string input to hash
+    'HASH': _hash,
+    # Transforms any date to stg
+    'MASK-DATE': _mask_date,
+    # Transforms any number to zero
+    'MASK-NUMBER': lambda value: 0,
     # Transforms any value to "hidden"
-    elif trans_type == "MASK-HIDDEN":
-        return_value = 'hidden'
+    'MASK-HIDDEN': lambda value: 'hidden',
+}
 
+# Transformation types with a single digit parameter at the end, e.g. HASH-SKIP-FIRST-2
+PARAMETRISED_VALUE_TRANSFORMERS = {
+    # Transforms string input to hash skipping first n characters, e.g. HASH-SKIP-FIRST-2
+    'HASH-SKIP-FIRST': _make_hash_skip_first,
     # Transforms string input to masked version skipping first and last n characters
     # e.g. MASK-STRING-SKIP-ENDS-3
-    elif 'MASK-STRING-SKIP-ENDS' in trans_type:
-        skip_ends_n = int(trans_type[-1])
-        value_len = len(value)
-        return_value = '*' * value_len if value_len <= (2 * skip_ends_n) \
-            else f'{value[:skip_ends_n]}{"*" * (value_len - (2 * skip_ends_n))}{value[-skip_ends_n:]}'
+    'MASK-STRING-SKIP-ENDS': _make_mask_string_skip_ends,
+}
+
+
+@lru_cache(maxsize=None)
+def get_value_transformer(trans_type: str) -> Callable[[Any], Any]:
+    """
+    Resolves the given transformation type into a function transforming a single value.
+    Parameters of parametrised transformation types, like the n of HASH-SKIP-FIRST-n, are
+    parsed here once instead of on every transformed value.
+    Args:
+        trans_type: transformation type to resolve
+
+    Returns:
+        function taking a value and returning the transformed value
+    """
+    if trans_type in VALUE_TRANSFORMERS:
+        return VALUE_TRANSFORMERS[trans_type]
+
+    for trans_type_prefix, make_transformer in PARAMETRISED_VALUE_TRANSFORMERS.items():
+        if trans_type_prefix in trans_type:
+            try:
+                return make_transformer(int(trans_type[-1]))
+            except ValueError:
+                LOGGER.warning('Cannot parse parameter of transformation type %s, returning same value', trans_type)
+                return lambda value: value
 
     # Return the original value if cannot find transformation type
     # todo: is this the right behavior?
-    else:
-        LOGGER.warning('Cannot find transformation type %s, returning same value', trans_type)
-        return_value = value
-
-    return return_value
+    LOGGER.warning('Cannot find transformation type %s, returning same value', trans_type)
+    return lambda value: value
@@ -1,11 +1,14 @@
 import argparse
 
-from typing import Dict
+from typing import BinaryIO, Dict, Iterator
 from singer import Catalog, get_logger, Schema
 from singer.utils import check_config, load_json
 
+from transform_field.codec import JSON_DECODERS
+
 
 LOGGER = get_logger('transform_field')
+DEFAULT_READ_BUFFER_BYTES = 1048576
 
 
 def parse_args(required_config_keys):
@@ -17,6 +20,10 @@ def parse_args(required_config_keys):
     -c,--config     Config file
     --validate     flag  to validate the transformations
     --catalog       Catalog file
+    --json-decoder  JSON decoder of the incoming messages
+    --pipelined     flag to read and write in background threads
+    --workers       Number of worker processes applying the transformations
+    --streaming     Transform and write every record immediately
 
     Returns the parsed args object from argparse. For each argument that
     point to JSON files (config, catalog), we will automatically
@@ -40,6 +47,28 @@ def parse_args(required_config_keys):
         '--catalog',
         help='Catalog file')
 
+    parser.add_argument(
+        '--json-decoder',
+        help='JSON decoder of the incoming messages, overrides `json_decoder` in the config file',
+        choices=JSON_DECODERS)
+
+    parser.add_argument(
+        '--pipelined',
+        help='Flag to read input and write output in background threads, overlapping them with transformations',
+        default=False,
+        action='store_true')
+
+    parser.add_argument(
+        '--workers',
+        help='Number of worker processes applying the transformations, overrides `workers` in the config file',
+        type=int)
+
+    parser.add_argument(
+        '--streaming',
+        help='Flag to transform and write every record immediately instead of in batches, for low latency',
+        default=False,
+        action='store_true')
+
     args = parser.parse_args()
 
     if args.config:
@@ -65,3 +94,45 @@ def get_stream_schemas(catalog: Catalog) -> Dict[str, Schema]:
         stream.tap_stream_id: stream.schema
         for stream in catalog.streams if stream.is_selected()
     }
+
+
+def read_lines(stream: BinaryIO, buffer_size: int = DEFAULT_READ_BUFFER_BYTES) -> Iterator[bytes]:
+    """
+    Read lines from a binary stream in large chunks, without decoding them
+    :param stream: binary stream to read, e.g. sys.stdin.buffer
+    :param buffer_size: size of the chunks to read in bytes
+    :return: Iterator of lines as bytes, including the trailing new line if any
+    """
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    pending = b''
+
+    # readinto1 returns the bytes already available instead of waiting until the buffer is full,
+    # so lines are not held back when the input is slow
+    readinto = getattr(stream, 'readinto1', stream.readinto)
+
+    while True:
+        size = readinto(buffer)
+        if not size:
+            break
+
+        chunk = bytes(view[:size])
+        start = 0
+        end = chunk.find(b'\n')
+
+        # The first line of the chunk is the continuation of the last incomplete line
+        if end >= 0 and pending:
+            yield pending + chunk[:end + 1]
+            pending = b''
+            start = end + 1
+            end = chunk.find(b'\n', start)
+
+        while end >= 0:
+            yield chunk[start:end + 1]
+            start = end + 1
+            end = chunk.find(b'\n', start)
+
+        pending += chunk[start:]
+
+    if pending:
+        yield pending
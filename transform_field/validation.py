@@ -0,0 +1,415 @@
+import re
+import random
+
+from numbers import Number
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from jsonschema import Draft7Validator, FormatChecker
+
+# Python types of the JSON types that can be checked by a single isinstance
+_SIMPLE_TYPES = {
+    'null': type(None),
+    'string': str,
+    'array': list,
+    'object': dict,
+}
+
+# JSON types that need more than an isinstance check, the same way as in Draft7Validator
+_TYPE_CHECKS = {
+    'boolean': lambda instance: isinstance(instance, bool),
+    'integer': lambda instance: (isinstance(instance, int) and not isinstance(instance, bool)) or (
+        isinstance(instance, float) and instance.is_integer()),
+    'number': lambda instance: isinstance(instance, Number) and not isinstance(instance, bool),
+}
+
+_is_number = _TYPE_CHECKS['number']
+
+# Keywords validated by the compiled validators, schemas with any other Draft 7 keyword
+# are validated by Draft7Validator. Keywords not in Draft 7, like `inclusion`, are ignored
+# by both validators.
+SUPPORTED_KEYWORDS = {
+    'type', 'properties', 'required', 'additionalProperties', 'items', 'format', 'pattern',
+    'maxLength', 'minLength', 'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+    'maxItems', 'minItems', 'anyOf', 'allOf', 'oneOf', 'not',
+}
+
+UNSUPPORTED_KEYWORDS = set(Draft7Validator.VALIDATORS) - SUPPORTED_KEYWORDS
+
+# Validation modes of the records of a stream
+#  off: no record is validated
+#  full: every record is validated
+#  sample:N: every Nth record is validated, or a random fraction of the records if N is between 0 and 1
+#  first:N: the first N records after each SCHEMA message are validated
+VALIDATION_MODE_OFF = 'off'
+VALIDATION_MODE_FULL = 'full'
+VALIDATION_MODE_SAMPLE = 'sample'
+VALIDATION_MODE_FIRST = 'first'
+
+
+class UnsupportedSchemaException(Exception):
+    """Raised when a schema cannot be compiled into a validator"""
+
+
+def parse_validation_mode(mode: str) -> Tuple[str, Optional[Union[int, float]]]:
+    """
+    Parse a validation mode
+    Args:
+        mode: one of `off`, `full`, `sample:N` or `first:N`
+
+    Returns:
+        name of the mode and its parameter, None for modes without parameter
+
+    Raises:
+        ValueError if the mode is invalid
+    """
+    name, _, param = mode.partition(':')
+
+    if name in (VALIDATION_MODE_OFF, VALIDATION_MODE_FULL) and not param:
+        return name, None
+
+    try:
+        if name == VALIDATION_MODE_SAMPLE:
+            if '.' in param:
+                fraction = float(param)
+                if 0 < fraction <= 1:
+                    return name, fraction
+            elif int(param) >= 1:
+                return name, int(param)
+
+        elif name == VALIDATION_MODE_FIRST and int(param) >= 0:
+            return name, int(param)
+
+    except ValueError:
+        pass
+
+    raise ValueError(f'Invalid validation mode `{mode}`, supported modes are '
+                     f'{VALIDATION_MODE_OFF}, {VALIDATION_MODE_FULL}, {VALIDATION_MODE_SAMPLE}:N and '
+                     f'{VALIDATION_MODE_FIRST}:N')
+
+
+def _any(_instance: Any) -> bool:
+    """Validator of schemas without any validation keyword"""
+    return True
+
+
+def _all_of(checks) -> Callable[[Any], bool]:
+    """Combine checks into a single check that is met only if every check is met"""
+    if not checks:
+        return _any
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(instance: Any) -> bool:
+        for check_one in checks:
+            if not check_one(instance):
+                return False
+
+        return True
+
+    return check
+
+
+def _compile_type(types: Union[str, list]) -> Callable[[Any], bool]:
+    if isinstance(types, str):
+        types = [types]
+
+    for json_type in types:
+        if json_type not in _SIMPLE_TYPES and json_type not in _TYPE_CHECKS:
+            raise UnsupportedSchemaException(f'Unknown type `{json_type}`')
+
+    python_types = tuple(_SIMPLE_TYPES[json_type] for json_type in types if json_type in _SIMPLE_TYPES)
+    other_checks = [_TYPE_CHECKS[json_type] for json_type in types if json_type in _TYPE_CHECKS]
+
+    if not other_checks:
+        return lambda instance: isinstance(instance, python_types)
+
+    return lambda instance: isinstance(instance, python_types) or any(check(instance) for check in other_checks)
+
+
+def _compile_object(schema: Dict, format_checker: FormatChecker) -> Callable[[Any], bool]:
+    properties = schema.get('properties', {})
+    compiled_properties = {}
+    for name, property_schema in properties.items():
+        compiled_property = compile_schema(property_schema, format_checker)
+        # No need to check properties that are always valid
+        if compiled_property is not _any:
+            compiled_properties[name] = compiled_property
+
+    required = schema.get('required', [])
+    additional_properties = schema.get('additionalProperties', True)
+    check_additional = _any if additional_properties is True else compile_schema(additional_properties, format_checker)
+
+    def check(instance: Any) -> bool:
+        if not isinstance(instance, dict):
+            return True
+
+        for key in required:
+            if key not in instance:
+                return False
+
+        for name, value in instance.items():
+            check_property = compiled_properties.get(name)
+            if check_property is not None:
+                if not check_property(value):
+                    return False
+
+            elif check_additional is not _any and name not in properties and not check_additional(value):
+                return False
+
+        return True
+
+    return check
+
+
+def _compile_array(schema: Dict, format_checker: FormatChecker) -> Callable[[Any], bool]:
+    items = schema.get('items', True)
+    if isinstance(items, list):
+        raise UnsupportedSchemaException('Tuple validation of arrays is not supported')
+
+    check_item = compile_schema(items, format_checker)
+    max_items = schema.get('maxItems')
+    min_items = schema.get('minItems')
+
+    def check(instance: Any) -> bool:
+        if not isinstance(instance, list):
+            return True
+
+        if (max_items is not None and len(instance) > max_items) or \
+                (min_items is not None and len(instance) < min_items):
+            return False
+
+        return check_item is _any or all(check_item(item) for item in instance)
+
+    return check
+
+
+def _compile_string(schema: Dict) -> Callable[[Any], bool]:
+    checks = []
+
+    if 'maxLength' in schema:
+        max_length = schema['maxLength']
+        checks.append(lambda instance: len(instance) <= max_length)
+
+    if 'minLength' in schema:
+        min_length = schema['minLength']
+        checks.append(lambda instance: len(instance) >= min_length)
+
+    if 'pattern' in schema:
+        search = re.compile(schema['pattern']).search
+        checks.append(lambda instance: bool(search(instance)))
+
+    check_string = _all_of(checks)
+
+    if check_string is _any:
+        return _any
+
+    return lambda instance: not isinstance(instance, str) or check_string(instance)
+
+
+def _compile_number(schema: Dict) -> Callable[[Any], bool]:
+    checks = []
+
+    if 'minimum' in schema:
+        minimum = schema['minimum']
+        checks.append(lambda instance: instance >= minimum)
+
+    if 'maximum' in schema:
+        maximum = schema['maximum']
+        checks.append(lambda instance: instance <= maximum)
+
+    if 'exclusiveMinimum' in schema:
+        exclusive_minimum = schema['exclusiveMinimum']
+        checks.append(lambda instance: instance > exclusive_minimum)
+
+    if 'exclusiveMaximum' in schema:
+        exclusive_maximum = schema['exclusiveMaximum']
+        checks.append(lambda instance: instance < exclusive_maximum)
+
+    check_number = _all_of(checks)
+
+    if check_number is _any:
+        return _any
+
+    return lambda instance: not _is_number(instance) or check_number(instance)
+
+
+def _compile_subschemas(schema: Dict, format_checker: FormatChecker) -> Callable[[Any], bool]:
+    checks = []
+
+    if 'allOf' in schema:
+        checks.append(_all_of([compile_schema(subschema, format_checker) for subschema in schema['allOf']]))
+
+    if 'anyOf' in schema:
+        any_of = [compile_schema(subschema, format_checker) for subschema in schema['anyOf']]
+        checks.append(lambda instance: any(check(instance) for check in any_of))
+
+    if 'oneOf' in schema:
+        one_of = [compile_schema(subschema, format_checker) for subschema in schema['oneOf']]
+        checks.append(lambda instance: sum(1 for check in one_of if check(instance)) == 1)
+
+    if 'not' in schema:
+        check_not = compile_schema(schema['not'], format_checker)
+        checks.append(lambda instance: not check_not(instance))
+
+    return _all_of(checks)
+
+
+def compile_schema(schema: Union[Dict, bool], format_checker: FormatChecker) -> Callable[[Any], bool]:
+    """
+    Compiles a JSON schema into a function checking if an instance is valid, specialised to the
+    keywords used by the schema. Validates the same way as Draft7Validator but without collecting errors.
+    Args:
+        schema: JSON schema with numbers as Decimal
+        format_checker: checker of the `format` keyword
+
+    Returns:
+        function taking an instance and returning True if it's valid
+
+    Raises:
+        UnsupportedSchemaException if the schema uses a keyword that cannot be compiled
+    """
+    if schema is True:
+        return _any
+
+    if schema is False:
+        return lambda instance: False
+
+    if not isinstance(schema, dict):
+        raise UnsupportedSchemaException(f'Invalid schema {schema}')
+
+    unsupported_keywords = UNSUPPORTED_KEYWORDS.intersection(schema)
+    if unsupported_keywords:
+        raise UnsupportedSchemaException(f'Unsupported keywords {", ".join(sorted(unsupported_keywords))}')
+
+    checks = []
+
+    if 'type' in schema:
+        checks.append(_compile_type(schema['type']))
+
+    if 'properties' in schema or 'required' in schema or 'additionalProperties' in schema:
+        checks.append(_compile_object(schema, format_checker))
+
+    if 'items' in schema or 'maxItems' in schema or 'minItems' in schema:
+        checks.append(_compile_array(schema, format_checker))
+
+    checks.append(_compile_string(schema))
+    checks.append(_compile_number(schema))
+    checks.append(_compile_subschemas(schema, format_checker))
+
+    # Unknown formats are not checked, the same way as by Draft7Validator
+    if 'format' in schema and schema['format'] in format_checker.checkers:
+        conforms = format_checker.conforms
+        schema_format = schema['format']
+        checks.append(lambda instance: conforms(instance, schema_format))
+
+    return _all_of([check for check in checks if check is not _any])
+
+
+class SchemaValidator:
+    """
+    Validator of records against the JSON schema of a stream. Uses a validator compiled from
+    the schema and falls back to Draft7Validator if the schema cannot be compiled. Invalid
+    records are validated again by Draft7Validator to raise its detailed ValidationError.
+    """
+
+    def __init__(self, schema: Dict):
+        self.validator = Draft7Validator(schema, format_checker=FormatChecker())
+
+        try:
+            self.is_valid = compile_schema(schema, self.validator.format_checker)
+        except UnsupportedSchemaException:
+            self.is_valid = None
+
+    def validate(self, instance: Any):
+        """Validate an instance, raising the error of Draft7Validator if it's invalid"""
+        if self.is_valid is not None:
+            try:
+                if self.is_valid(instance):
+                    return
+            except Exception:
+                # e.g. comparing Decimals with NaN, Draft7Validator raises the same error
+                pass
+
+        self.validator.validate(instance)
+
+    @property
+    def compiled(self) -> bool:
+        """True if the schema has been compiled, False if validated by Draft7Validator"""
+        return self.is_valid is not None
+
+
+class StreamValidator:
+    """
+    Validator of the records of a stream, built once per SCHEMA message. Besides the whole
+    record, it can validate only the properties that are transformed in the stream, using
+    the sub-schemas of those properties extracted from the stream schema.
+    """
+
+    def __init__(self, schema: Dict, key_properties: Optional[List[str]], trans_fields: Iterable[str]):
+        properties = schema.get('properties', {})
+
+        self.validator = SchemaValidator(schema)
+        self.key_properties = key_properties or []
+        self.key_properties_set = frozenset(self.key_properties)
+        self.trans_fields = [field for field in dict.fromkeys(trans_fields) if field in properties]
+        self.trans_validator = SchemaValidator({
+            'properties': {field: properties[field] for field in self.trans_fields}
+        })
+
+    def validate(self, record: Dict):
+        """Validate every property of a record"""
+        self.validator.validate(record)
+
+    def validate_transformed(self, record: Dict):
+        """Validate only the transformed properties of a record"""
+        self.trans_validator.validate({field: record[field] for field in self.trans_fields if field in record})
+
+    def get_missing_key_property(self, record: Dict) -> Optional[str]:
+        """Get the first key property missing from a record, None if every key property is present"""
+        if self.key_properties_set.issubset(record.keys()):
+            return None
+
+        return next(key for key in self.key_properties if key not in record)
+
+
+class RecordSampler:
+    """
+    Decides which records of a stream are validated according to the validation mode of the
+    stream, and counts the validated and skipped records
+    """
+
+    def __init__(self, mode: str):
+        self.mode, self.param = parse_validation_mode(mode)
+        self.validated = 0
+        self.skipped = 0
+        # Records seen since the last SCHEMA message
+        self.seen = 0
+
+    @property
+    def enabled(self) -> bool:
+        """False if no record is ever validated"""
+        return self.mode != VALIDATION_MODE_OFF
+
+    def reset(self):
+        """Start sampling again, called on every SCHEMA message of the stream"""
+        self.seen = 0
+
+    def is_sampled(self) -> bool:
+        """Check if the next record has to be validated, counting it as validated or skipped"""
+        if self.mode == VALIDATION_MODE_FULL:
+            sampled = True
+        elif self.mode == VALIDATION_MODE_SAMPLE:
+            sampled = self.seen % self.param == 0 if isinstance(self.param, int) else random.random() < self.param
+        elif self.mode == VALIDATION_MODE_FIRST:
+            sampled = self.seen < self.param
+        else:
+            sampled = False
+
+        self.seen += 1
+
+        if sampled:
+            self.validated += 1
+        else:
+            self.skipped += 1
+
+        return sampled
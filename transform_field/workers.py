@@ -0,0 +1,97 @@
+import multiprocessing
+import singer
+
+from typing import Dict, List, Tuple
+
+from transform_field import transform
+
+# Batches smaller than this number of records per worker are transformed in the main process,
+# as shipping them to the workers would cost more than transforming them
+MIN_CHUNK_RECORDS = 500
+
+# Chunks per worker, more chunks balance the load better between workers
+CHUNKS_PER_WORKER = 4
+
+# Compiled transformations of the worker process, set when the worker starts
+_TRANS_PLAN = {}
+
+
+def _init_worker(trans_meta: Dict):
+    """Compile the transformations once in every worker process"""
+    global _TRANS_PLAN  # pylint: disable=global-statement
+    _TRANS_PLAN = transform.compile_trans_plan(trans_meta)
+
+
+def _transform_chunk(args: Tuple[str, List[Dict]]) -> List[Tuple[int, Dict]]:
+    """
+    Transform a chunk of records of a stream in a worker process
+    :param args: stream name and the records to transform
+    :return: List of position in the chunk and transformed record, only for records changed by the transformations
+    """
+    stream, records = args
+    trans_plan = _TRANS_PLAN.get(stream, [])
+    changed_records = []
+
+    for position, record in enumerate(records):
+        changed = False
+        for apply_transformation in trans_plan:
+            changed = apply_transformation(record) or changed
+
+        if changed:
+            changed_records.append((position, record))
+
+    return changed_records
+
+
+class TransformPool:
+    """
+    Pool of worker processes applying the transformations to batches of records.
+    Batches are split into chunks transformed in parallel, and the results are
+    reassembled in the original order of the records.
+    """
+
+    def __init__(self, trans_meta: Dict, workers: int):
+        self.trans_meta = trans_meta
+        self.workers = workers
+        self.pool = None
+
+    def is_worth(self, num_records: int) -> bool:
+        """Check if a batch is large enough to transform it in the worker processes"""
+        return num_records >= self.workers * MIN_CHUNK_RECORDS
+
+    def transform(self, stream: str, messages: List[singer.Message]) -> List[bool]:
+        """
+        Transform the records of a batch in the worker processes, replacing the record of every
+        changed RecordMessage with its transformed record
+        :param stream: name of the stream of the batch
+        :param messages: messages of the batch
+        :return: List telling for every message if it has been changed by the transformations
+        """
+        if self.pool is None:
+            # Workers are started with spawn, as forking a process having threads is not safe
+            self.pool = multiprocessing.get_context('spawn').Pool(
+                self.workers, initializer=_init_worker, initargs=(self.trans_meta,))
+
+        positions = [i for i, message in enumerate(messages) if isinstance(message, singer.RecordMessage)]
+        chunk_size = -(-len(positions) // (self.workers * CHUNKS_PER_WORKER))
+        chunks = [positions[start:start + chunk_size] for start in range(0, len(positions), chunk_size)]
+
+        changes = [False] * len(messages)
+
+        # map returns the results in the order of the chunks
+        results = self.pool.map(_transform_chunk,
+                                [(stream, [messages[i].record for i in chunk]) for chunk in chunks])
+
+        for chunk, changed_records in zip(chunks, results):
+            for position, record in changed_records:
+                messages[chunk[position]].record = record
+                changes[chunk[position]] = True
+
+        return changes
+
+    def close(self):
+        """Stop the worker processes"""
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None